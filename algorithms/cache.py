@@ -0,0 +1,233 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, Hashable, Optional, Tuple
+from algorithms import smoothing
+
+import numpy as np
+
+# default memory budget of an IndicatorCache, in bytes
+MAX_BYTES = 256 * 2**20
+
+# number of leading and trailing data points kept per entry to check that a named series was only appended to
+TAIL_SIZE = 16
+
+
+def fingerprint(data: np.ndarray) -> str:
+    """
+    Returns a digest of an array's shape, dtype and contents, identifying a series by value.
+
+    Computing it reads the whole array, so it only pays off when the same series is smoothed several times (EX: a
+    parameter sweep): compute it once and pass it as the series name.
+    """
+
+    data = np.ascontiguousarray(data)
+    digest = hashlib.sha1(f"{data.shape}{data.dtype.str}".encode())
+    digest.update(memoryview(data).cast("B"))
+    return digest.hexdigest()
+
+
+@dataclass
+class CacheStats:
+    """Counters of an IndicatorCache."""
+    hits: int = 0  # answered from memory or from the spill directory
+    misses: int = 0  # computed from scratch
+    extensions: int = 0  # computed only for the data points appended since the cached result
+    evictions: int = 0  # dropped from memory to stay within the budget
+    spill_hits: int = 0  # hits (and extensions) read back from the spill directory
+    entries: int = 0
+    bytes: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of lookups that did not compute from scratch."""
+        lookups = self.hits + self.misses + self.extensions
+        return (self.hits + self.extensions) / lookups if lookups else 0.0
+
+
+class _Entry:
+    __slots__ = ("length", "head", "tail", "result")
+
+    def __init__(self, length: int, head: np.ndarray, tail: np.ndarray, result: np.ndarray):
+        self.length = length
+        self.head = head
+        self.tail = tail
+        self.result = result
+
+    @property
+    def nbytes(self) -> int:
+        return self.head.nbytes + self.tail.nbytes + self.result.nbytes
+
+
+class IndicatorCache:
+    """
+    Memoizes the smoothing functions, keyed by (indicator, parameters, series).
+
+    A series is identified by a name given by the caller, EX: ("coinbase", "BTC/USD", "1d"), or by value with
+    fingerprint(data). Unnamed calls are computed without caching, hashing a series costs about as much as smoothing
+    it once. When a named series grows by appending, its cached SMAs and EMAs are extended over the new points
+    instead of recomputed; a series that was replaced instead (EX: a window that slid forward) is recomputed.
+    Entries are evicted least recently used first once the cache holds more than max_bytes, into spill_directory if
+    one is given (which is not size limited).
+
+    Results are read-only views shared between callers. The cache is safe to use from several threads.
+    """
+
+    def __init__(self, max_bytes: int = MAX_BYTES, spill_directory: Optional[str] = None):
+        """
+        Parameters:
+        - max_bytes (int): Memory budget for cached results, 0 disables caching in memory.
+        - spill_directory (str): Directory evicted results are written to and read back from, None to drop them.
+        """
+
+        self.max_bytes = max_bytes
+        self.spill_directory = spill_directory
+        self.stats = CacheStats()
+        self._entries: "OrderedDict[Tuple, _Entry]" = OrderedDict()
+        self._spilled: Dict[Tuple, str] = {}
+        self._lock = threading.Lock()
+
+    def simple_moving_average(self, data: np.ndarray, window: int, approximate_start: bool = True,
+                              series: Optional[Hashable] = None) -> np.ndarray:
+        """
+        Cached algorithms.smoothing.simple_moving_average_array.
+
+        Parameters:
+        - data (np.ndarray): Numerical data points, smoothed along the last axis.
+        - window (int): The number of consecutive data points to average over.
+        - approximate_start (bool): If True, we approximate the averages of the first "window" elements.
+        - series (Hashable): Name of the series, EX: (exchange id, symbol, timeframe). None computes the averages
+          without caching them.
+
+        Returns:
+        - np.ndarray: The moving averages, read-only.
+        """
+
+        def extend(previous: np.ndarray, data: np.ndarray, length: int) -> Optional[np.ndarray]:
+            # the rolling update needs a complete window before the new points
+            if length < window:
+                return None
+            steps = (data[..., length:] - data[..., length-window:-window]) / window
+            return np.concatenate((previous, previous[..., -1:] + np.cumsum(steps, axis=-1)), axis=-1)
+
+        return self._get(("sma", window, approximate_start), data, series,
+                          lambda data: smoothing.simple_moving_average_array(data, window, approximate_start), extend)
+
+    def exponential_moving_average(self, data: np.ndarray, alpha: float = 0.6,
+                                   series: Optional[Hashable] = None) -> np.ndarray:
+        """
+        Cached algorithms.smoothing.exponential_moving_average_array, see simple_moving_average.
+        """
+
+        def extend(previous: np.ndarray, data: np.ndarray, length: int) -> np.ndarray:
+            appended = smoothing.exponential_moving_average_array(data[..., length:], alpha, previous[..., -1])
+            return np.concatenate((previous, appended), axis=-1)
+
+        return self._get(("ema", float(alpha)), data, series,
+                         lambda data: smoothing.exponential_moving_average_array(data, alpha), extend)
+
+    def clear(self) -> None:
+        """
+        Drops every cached result, including spilled ones, and resets the statistics.
+        """
+
+        with self._lock:
+            for path in self._spilled.values():
+                if os.path.exists(path):
+                    os.remove(path)
+            self._entries.clear()
+            self._spilled.clear()
+            self.stats = CacheStats()
+
+    def _get(self, indicator: Tuple, data: np.ndarray, series: Optional[Hashable],
+             compute: Callable[[np.ndarray], np.ndarray],
+             extend: Callable[[np.ndarray, np.ndarray, int], Optional[np.ndarray]]) -> np.ndarray:
+        data = np.asarray(data, dtype=np.float64)
+        if series is None:
+            return compute(data)
+        key = indicator + (series,)
+        length = data.shape[-1]
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            spilled = entry is None and key in self._spilled
+            if spilled:
+                entry = self._load(key)
+
+        # reuse the entry if the data still starts with what it was computed on
+        result = None
+        if entry is not None and self._continues(entry, data):
+            if entry.length == length:
+                result, counter = entry.result, "hits"
+            else:
+                result, counter = extend(entry.result, data, entry.length), "extensions"
+        if result is None:
+            result, counter = compute(data), "misses"
+
+        with self._lock:
+            setattr(self.stats, counter, getattr(self.stats, counter) + 1)
+            if spilled and counter != "misses":
+                self.stats.spill_hits += 1
+            if counter != "hits" or spilled:
+                result.flags.writeable = False
+                head, tail = data[..., :TAIL_SIZE].copy(), data[..., max(0, length - TAIL_SIZE):].copy()
+                self._store(key, _Entry(length, head, tail, result))
+        return result
+
+    @staticmethod
+    def _continues(entry: _Entry, data: np.ndarray) -> bool:
+        # cheap check that a named series was appended to rather than replaced: compare the cached leading and
+        # trailing points, the leading ones tell a window that slid forward over flat prices apart
+        if data.shape[-1] < entry.length or data.shape[:-1] != entry.tail.shape[:-1]:
+            return False
+        start = entry.length - entry.tail.shape[-1]
+        return (np.array_equal(data[..., :entry.head.shape[-1]], entry.head, equal_nan=True)
+                and np.array_equal(data[..., start:entry.length], entry.tail, equal_nan=True))
+
+    def _store(self, key: Tuple, entry: _Entry) -> None:
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self.stats.bytes -= previous.nbytes
+
+        # a result larger than the whole budget would evict everything else
+        if entry.nbytes > self.max_bytes:
+            if self.spill_directory is not None:
+                self._spill(key, entry)
+            self.stats.entries = len(self._entries)
+            return
+
+        self._entries[key] = entry
+        self.stats.bytes += entry.nbytes
+
+        # evict least recently used entries until the cache fits its budget
+        while self.stats.bytes > self.max_bytes and self._entries:
+            evicted_key, evicted = self._entries.popitem(last=False)
+            self.stats.bytes -= evicted.nbytes
+            self.stats.evictions += 1
+            if self.spill_directory is not None:
+                self._spill(evicted_key, evicted)
+        self.stats.entries = len(self._entries)
+
+    def _spill(self, key: Tuple, entry: _Entry) -> None:
+        os.makedirs(self.spill_directory, exist_ok=True)
+        path = os.path.join(self.spill_directory, hashlib.sha1(repr(key).encode()).hexdigest() + ".npz")
+        np.savez(path, length=entry.length, head=entry.head, tail=entry.tail, result=entry.result)
+        self._spilled[key] = path
+
+    def _load(self, key: Tuple) -> Optional[_Entry]:
+        path = self._spilled.pop(key)
+        try:
+            with np.load(path) as arrays:
+                entry = _Entry(int(arrays["length"]), arrays["head"], arrays["tail"], arrays["result"])
+        except OSError:
+            return None
+        os.remove(path)
+        return entry
+
+
+# cache shared by the strategies
+default_cache = IndicatorCache()
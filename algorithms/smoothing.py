@@ -1,4 +1,16 @@
-from typing import List
+from functools import lru_cache
+from typing import List, Optional, Tuple
+from instrumentation import metrics
+
+import numpy as np
+
+# number of data points the EMA recurrence is solved for at once, see exponential_moving_average_array
+EMA_BLOCK_SIZE = 256
+
+# below this many data points exponential_moving_average runs the recurrence in Python, which beats converting to
+# and from an array and the matrix product
+EMA_SCALAR_THRESHOLD = 512
+
 
 def simple_moving_average(data: List[float], window: int, approximate_start: bool=True) -> List[float]:
     """
@@ -12,40 +24,11 @@ def simple_moving_average(data: List[float], window: int, approximate_start: boo
     - approximate_start (bool): If True, we approximate the averages of the first "window" elements.
 
     Returns:
-    - List[float]: A list containing the moving averages.
+    - List[float]: A list containing the moving averages. Without approximate_start there is one average for
+      every complete window, len(data) - window + 1 in total.
     """
     
-    # check if window size is valid
-    if window <= 0:
-        raise ValueError("window must be a positive integer.")
-    if window > len(data):
-        raise ValueError("window cannot be larger than the dataset")
-
-    # define variables necessary for computation
-    sma: List[float] = []
-    average: float = 0
-
-    # if requested, approximate a smooth average for the first "window" values
-    if (approximate_start):
-        sma.append(data[0])
-        for i in range(1, window):
-            average = sum(data[0:i])/i
-            sma.append(average)
-
-        # compute moving average for the rest of the values
-        for i in range(window, len(data)):
-            average += (data[i] - data[i-window])/window
-            sma.append(average)
-    else:
-        # compute the first moving average 
-        average = sum(data[0:window])/window
-        sma.append(average)
-
-        for i in range(1, len(data)):
-            average += (data[i] - data[i-window])/window
-            sma.append(average)
-
-    return sma
+    return simple_moving_average_array(data, window, approximate_start).tolist()
 
 
 def exponential_moving_average(data: List[float], alpha: float=0.6) -> List[float]:
@@ -64,13 +47,305 @@ def exponential_moving_average(data: List[float], alpha: float=0.6) -> List[floa
     - List[float]: A list containing the moving averages.
     """
 
-    # define variables necessary for computation
+    if len(data) >= EMA_SCALAR_THRESHOLD or (isinstance(data, np.ndarray) and data.ndim > 1):
+        return exponential_moving_average_array(data, alpha).tolist()
+
+    # short series, EX: the daily closes the live strategies fetch
+    data = data.tolist() if isinstance(data, np.ndarray) else data
+    if not data:
+        return []
     smoothed_curve: List[float] = [data[0]]
     current_estimate: float = data[0]  # initial condition
-
-    # compute the exponential moving average for the rest of the time-series
-    for i in range(1, len(data)):
-        current_estimate = (alpha*data[i]) + ((1-alpha) * current_estimate)
+    for point in data[1:]:
+        current_estimate = (alpha*point) + ((1-alpha) * current_estimate)
         smoothed_curve.append(current_estimate)
-    
+
     return smoothed_curve
+
+
+@metrics.timed("indicator")
+def simple_moving_average_array(data: np.ndarray, window: int, approximate_start: bool=True) -> np.ndarray:
+    """
+    NumPy version of simple_moving_average, computed from cumulative sums instead of a Python loop.
+
+    Multi-dimensional input is smoothed along its last axis, so many series can be processed at once.
+
+    Parameters:
+    - data (np.ndarray): Numerical data points, converted to float64 without copying if already float64.
+    - window (int): The number of consecutive data points to average over.
+    - approximate_start (bool): If True, we approximate the averages of the first "window" elements.
+
+    Returns:
+    - np.ndarray: The moving averages, see simple_moving_average.
+    """
+
+    data = np.asarray(data, dtype=np.float64)
+    length = data.shape[-1]
+
+    # check if window size is valid
+    if window <= 0:
+        raise ValueError("window must be a positive integer.")
+    if window > length:
+        raise ValueError("window cannot be larger than the dataset")
+
+    # rolling update applied to every average after the first complete window
+    steps = (data[..., window:] - data[..., :-window]) / window
+
+    if approximate_start:
+        sma = np.empty_like(data)
+
+        # the i-th of the first "window" values is the mean of the i values before it
+        sma[..., 0] = data[..., 0]
+        sma[..., 1:window] = np.cumsum(data[..., :window-1], axis=-1) / np.arange(1, window)
+
+        # the rolling average continues from the last approximated value
+        start = sma[..., window-1:window] if window > 1 else np.zeros(data.shape[:-1] + (1,))
+        sma[..., window:] = start + np.cumsum(steps, axis=-1)
+    else:
+        sma = np.empty(data.shape[:-1] + (length - window + 1,))
+        sma[..., :1] = np.mean(data[..., :window], axis=-1, keepdims=True)
+        sma[..., 1:] = sma[..., :1] + np.cumsum(steps, axis=-1)
+
+    return sma
+
+
+@metrics.timed("indicator")
+def exponential_moving_average_array(data: np.ndarray, alpha: float=0.6,
+                                     initial: Optional[np.ndarray]=None) -> np.ndarray:
+    """
+    NumPy version of exponential_moving_average.
+
+    The recurrence is solved in blocks of EMA_BLOCK_SIZE points: within a block every estimate is a weighted
+    sum of the block's data points (one matrix product for all blocks), plus the decayed estimate carried
+    over from the end of the previous block. Only the carries are computed one block at a time.
+
+    Multi-dimensional input is smoothed along its last axis, so many series can be processed at once.
+
+    Parameters:
+    - data (np.ndarray): Numerical data points, converted to float64 without copying if already float64.
+    - alpha (float): The smoothing parameter alpha; 0 <= alpha <= 1
+    - initial (np.ndarray): The estimate before the first data point (one per series), defaults to the first data
+      point. Passing the last average of a series continues it with new data points.
+
+    Returns:
+    - np.ndarray: The moving averages, see exponential_moving_average.
+    """
+
+    data = np.asarray(data, dtype=np.float64)
+    length = data.shape[-1]
+    smoothed_curve = np.empty_like(data)
+    if length == 0:
+        return smoothed_curve
+
+    block = min(EMA_BLOCK_SIZE, length)
+    weights, carry_weights = _ema_weights(float(alpha))
+
+    # the estimate before the first data point is the first data point itself (initial condition)
+    current_estimate = data[..., 0] if initial is None else np.broadcast_to(initial, data.shape[:-1])
+
+    # full blocks are smoothed with a single matrix product, the remainder with a truncated one
+    full = length // block * block
+    for start, stop in ((0, full), (full, length)):
+        if start == stop:
+            continue
+        size = min(block, stop - start)
+        blocks = data[..., start:stop].reshape(data.shape[:-1] + (-1, size))
+        local = blocks @ weights[:size, :size].T
+
+        # carry the last estimate of each block into the next one
+        carries = np.empty(local.shape[:-1])
+        for i in range(local.shape[-2]):
+            carries[..., i] = current_estimate
+            current_estimate = local[..., i, -1] + carry_weights[size-1] * current_estimate
+
+        smoothed = local + carries[..., np.newaxis] * carry_weights[:size]
+        smoothed_curve[..., start:stop] = smoothed.reshape(data.shape[:-1] + (stop - start,))
+
+    return smoothed_curve
+
+
+@lru_cache(maxsize=64)
+def _ema_weights(alpha: float) -> Tuple[np.ndarray, np.ndarray]:
+    # weights[j, k] is the weight of the k-th point of a block in the block's j-th estimate and carry_weights[j] the
+    # weight of the previous block's last estimate. the top-left corner serves any smaller block, so one matrix of
+    # EMA_BLOCK_SIZE points per alpha is built once and shared (read-only) by every call
+    decay = 1 - alpha
+    lags = np.subtract.outer(np.arange(EMA_BLOCK_SIZE), np.arange(EMA_BLOCK_SIZE))
+    weights = np.where(lags >= 0, alpha * decay ** np.maximum(lags, 0), 0.0)
+    weights[np.abs(weights) < np.finfo(np.float64).tiny] = 0  # avoid slow subnormal arithmetic
+    carry_weights = decay ** np.arange(1, EMA_BLOCK_SIZE + 1)
+    weights.flags.writeable = carry_weights.flags.writeable = False
+    return weights, carry_weights
+
+
+@metrics.timed("indicator")
+def weighted_moving_average_array(data: np.ndarray, window: int, approximate_start: bool=True) -> np.ndarray:
+    """
+    Computes the weighted moving average (WMA): the mean of "window" consecutive data points, weighted 1 for the
+    oldest up to "window" for the most recent.
+
+    Every window is the end of one block of "window" points plus the start of the next, so it is assembled from
+    running sums within the blocks (plain and weighted by the position in the block) instead of summing "window"
+    points. Cost is O(n) whatever the window, and since the sums restart every block rounding errors do not build
+    up over long series. Multi-dimensional input is smoothed along its last axis.
+
+    Parameters:
+    - data (np.ndarray): Numerical data points, converted to float64 without copying if already float64.
+    - window (int): The number of consecutive data points to average over.
+    - approximate_start (bool): If True, the first "window" - 1 averages weigh the data points seen so far
+      (1, 2, ... i) instead of being left out.
+
+    Returns:
+    - np.ndarray: The moving averages, len(data) - window + 1 of them without approximate_start.
+    """
+
+    blocks, starts, ends, offsets = _blocks(data, window)
+    positions = np.arange(window)
+
+    # running sums from the start of every block and from every point to the end of its block
+    forward = np.cumsum(blocks, axis=-1)
+    forward_weighted = np.cumsum(blocks * positions, axis=-1)
+    backward = _reverse_cumsum(blocks)
+    backward_weighted = _reverse_cumsum(blocks * positions)
+    forward, forward_weighted, backward, backward_weighted = (
+        _flatten(values) for values in (forward, forward_weighted, backward, backward_weighted))
+
+    # the window starting at offset j weighs the end of its block by 1 - j + position and the start of the next
+    # block by window - j + 1 + position, a window starting a block lies within that block
+    head = backward_weighted[..., starts] - (offsets - 1) * backward[..., starts]
+    tail = (window - offsets + 1) * forward[..., ends] + forward_weighted[..., ends]
+    weighted = (head + np.where(offsets > 0, tail, 0)) / (window * (window + 1) / 2)
+
+    if not approximate_start:
+        return weighted
+
+    # the i-th of the first points weighs the i points before it by 1, 2, ... i
+    counts = np.arange(1, window)
+    first = (forward_weighted[..., :window-1] + forward[..., :window-1]) / (counts * (counts + 1) / 2)
+    return np.concatenate((first, weighted), axis=-1)
+
+
+@metrics.timed("indicator")
+def rolling_max_array(data: np.ndarray, window: int, approximate_start: bool=True) -> np.ndarray:
+    """
+    Computes the highest of every "window" consecutive data points.
+
+    Every window is the end of one block of "window" points plus the start of the next, so its maximum is the
+    larger of a running maximum towards the block end and one from the block start (van Herk / Gil-Werman). Cost
+    is O(n) whatever the window, with no Python loop. See algorithms.streaming.RollingMax for the one point at a
+    time (monotonic deque) form.
+
+    Parameters:
+    - data (np.ndarray): Numerical data points, converted to float64 without copying if already float64.
+    - window (int): The number of consecutive data points to take the maximum of.
+    - approximate_start (bool): If True, the first "window" - 1 values are the maximum of the points seen so far.
+
+    Returns:
+    - np.ndarray: The rolling maxima, len(data) - window + 1 of them without approximate_start.
+    """
+
+    return _rolling_extreme(data, window, approximate_start, np.maximum)
+
+
+@metrics.timed("indicator")
+def rolling_min_array(data: np.ndarray, window: int, approximate_start: bool=True) -> np.ndarray:
+    """
+    Computes the lowest of every "window" consecutive data points, see rolling_max_array.
+    """
+
+    return _rolling_extreme(data, window, approximate_start, np.minimum)
+
+
+@metrics.timed("indicator")
+def rolling_std_array(data: np.ndarray, window: int, approximate_start: bool=True, ddof: int=0) -> np.ndarray:
+    """
+    Computes the standard deviation of every "window" consecutive data points, EX: as a volatility filter.
+
+    Every window is the end of one block of "window" points plus the start of the next. The count, mean and sum of
+    squared deviations of both parts come from running sums within the blocks (taken relative to the block's
+    first point, so they stay small) and are merged like parallel Welford updates. Cost is O(n) whatever the
+    window. See algorithms.streaming.RollingStandardDeviation for the one point at a time form.
+
+    Parameters:
+    - data (np.ndarray): Numerical data points, converted to float64 without copying if already float64.
+    - window (int): The number of consecutive data points to measure.
+    - approximate_start (bool): If True, the first "window" - 1 values measure the points seen so far.
+    - ddof (int): Delta degrees of freedom, 0 for the population and 1 for the sample standard deviation. Windows
+      with no more than ddof points are NaN.
+
+    Returns:
+    - np.ndarray: The rolling standard deviations, len(data) - window + 1 of them without approximate_start.
+    """
+
+    blocks, starts, ends, offsets = _blocks(data, window)
+    shifts = blocks[..., :1]
+    shifted = blocks - shifts
+
+    # count, mean and sum of squared deviations from the start of every block, and to the end of its block
+    counts = np.arange(1, window + 1)
+    sums, squares = np.cumsum(shifted, axis=-1), np.cumsum(shifted * shifted, axis=-1)
+    forward_mean = _flatten(sums / counts + shifts)
+    forward_deviations = _flatten(squares - sums * sums / counts)
+
+    counts = counts[::-1]
+    sums, squares = _reverse_cumsum(shifted), _reverse_cumsum(shifted * shifted)
+    backward_mean = _flatten(sums / counts + shifts)
+    backward_deviations = _flatten(squares - sums * sums / counts)
+
+    # merge the end of a block (window - j points) with the start of the next (j points)
+    delta = forward_mean[..., ends] - backward_mean[..., starts]
+    merged = forward_deviations[..., ends] + delta * delta * (window - offsets) * offsets / window
+    deviations = backward_deviations[..., starts] + np.where(offsets > 0, merged, 0)
+    counts = np.full(len(starts), window)
+
+    if approximate_start:
+        deviations = np.concatenate((forward_deviations[..., :window-1], deviations), axis=-1)
+        counts = np.concatenate((np.arange(1, window), counts))
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        variance = np.maximum(deviations, 0) / (counts - ddof)
+    variance[..., counts <= ddof] = np.nan
+    return np.sqrt(variance)
+
+
+def _blocks(data: np.ndarray, window: int):
+    # splits the last axis into blocks of "window" points, padded at the end, and returns them with the flat
+    # indices of the first and last point of every complete window and the first point's offset in its block
+    data = np.asarray(data, dtype=np.float64)
+    length = data.shape[-1]
+
+    # check if window size is valid
+    if window <= 0:
+        raise ValueError("window must be a positive integer.")
+    if window > length:
+        raise ValueError("window cannot be larger than the dataset")
+
+    # windows never reach into the padding, they end at a real point and running sums only look backwards
+    count = -(-length // window)
+    padded = np.zeros(data.shape[:-1] + (count * window,))
+    padded[..., :length] = data
+
+    starts = np.arange(length - window + 1)
+    return padded.reshape(data.shape[:-1] + (count, window)), starts, starts + window - 1, starts % window
+
+
+def _flatten(blocks: np.ndarray) -> np.ndarray:
+    return blocks.reshape(blocks.shape[:-2] + (-1,))
+
+
+def _reverse_cumsum(blocks: np.ndarray) -> np.ndarray:
+    return np.cumsum(blocks[..., ::-1], axis=-1)[..., ::-1]
+
+
+def _rolling_extreme(data: np.ndarray, window: int, approximate_start: bool, function: np.ufunc) -> np.ndarray:
+    blocks, starts, ends, _ = _blocks(data, window)
+
+    # running extremes from the start of every block and from every point to the end of its block, a window
+    # starting a block is covered by the backward one alone, taking it twice does not change the result
+    forward = _flatten(function.accumulate(blocks, axis=-1))
+    backward = _flatten(function.accumulate(blocks[..., ::-1], axis=-1)[..., ::-1])
+    extremes = function(backward[..., starts], forward[..., ends])
+
+    if not approximate_start:
+        return extremes
+    return np.concatenate((forward[..., :window-1], extremes), axis=-1)
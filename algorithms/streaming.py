@@ -0,0 +1,322 @@
+import math
+from collections import deque
+from typing import Deque, Iterable, List, Optional, Tuple
+
+
+class SimpleMovingAverage:
+    """
+    Streaming simple moving average (SMA) over the last "window" values, backed by a ring buffer.
+
+    Each update is amortized O(1): the running sum is recomputed over the buffer once per lap so rounding errors
+    cannot accumulate. Until "window" values have been seen the average is taken over the values seen so far.
+    """
+
+    __slots__ = ("window", "value", "_buffer", "_index", "_count", "_total")
+
+    def __init__(self, window: int):
+        """
+        Parameters:
+        - window (int): The number of consecutive data points to average over.
+        """
+
+        if window <= 0:
+            raise ValueError("window must be a positive integer.")
+
+        self.window = window
+        self.value: Optional[float] = None
+        self._buffer: List[float] = [0.0] * window
+        self._index: int = 0
+        self._count: int = 0
+        self._total: float = 0.0
+
+    @property
+    def ready(self) -> bool:
+        """True once a full window of values has been seen."""
+        return self._count == self.window
+
+    def update(self, data_point: float) -> float:
+        """
+        Adds the newest data point and returns the updated average.
+        """
+
+        if self._count < self.window:
+            self._count += 1
+        else:
+            self._total -= self._buffer[self._index]
+        self._total += data_point
+        self._buffer[self._index] = data_point
+
+        self._index += 1
+        if self._index == self.window:
+            self._index = 0
+            # recompute the sum once per lap of the buffer so rounding errors cannot accumulate
+            self._total = sum(self._buffer)
+
+        self.value = self._total / self._count
+        return self.value
+
+    def extend(self, data: Iterable[float]) -> Optional[float]:
+        """
+        Adds several data points, oldest first, and returns the latest average.
+        """
+
+        for data_point in data:
+            self.update(data_point)
+        return self.value
+
+
+class ExponentialMovingAverage:
+    """
+    Streaming exponential moving average (EMA), keeping a single running estimate.
+
+    next_estimate = (alpha * most_recent_data_point) + ((1-alpha) * current_estimate), the first data point is
+    the initial estimate.
+    """
+
+    __slots__ = ("alpha", "value")
+
+    def __init__(self, alpha: float = 0.6):
+        """
+        Parameters:
+        - alpha (float): The smoothing parameter alpha; 0 <= alpha <= 1
+        """
+
+        self.alpha = alpha
+        self.value: Optional[float] = None
+
+    @property
+    def ready(self) -> bool:
+        """True once an estimate exists."""
+        return self.value is not None
+
+    def update(self, data_point: float) -> float:
+        """
+        Adds the newest data point and returns the updated estimate.
+        """
+
+        if self.value is None:
+            self.value = data_point
+        else:
+            self.value = (self.alpha * data_point) + ((1 - self.alpha) * self.value)
+        return self.value
+
+    def extend(self, data: Iterable[float]) -> Optional[float]:
+        """
+        Adds several data points, oldest first, and returns the latest estimate.
+        """
+
+        for data_point in data:
+            self.update(data_point)
+        return self.value
+
+
+class WeightedMovingAverage:
+    """
+    Streaming weighted moving average (WMA) over the last "window" values, backed by a ring buffer.
+
+    Each update is amortized O(1): the weighted sum gains window times the new value and loses the plain sum of the
+    previous window, both sums are recomputed over the buffer once per lap so rounding errors cannot accumulate.
+    Until "window" values have been seen they are weighted 1, 2, ... by age.
+    """
+
+    __slots__ = ("window", "value", "_buffer", "_index", "_count", "_total", "_weighted")
+
+    def __init__(self, window: int):
+        """
+        Parameters:
+        - window (int): The number of consecutive data points to average over.
+        """
+
+        if window <= 0:
+            raise ValueError("window must be a positive integer.")
+
+        self.window = window
+        self.value: Optional[float] = None
+        self._buffer: List[float] = [0.0] * window
+        self._index: int = 0
+        self._count: int = 0
+        self._total: float = 0.0
+        self._weighted: float = 0.0
+
+    @property
+    def ready(self) -> bool:
+        """True once a full window of values has been seen."""
+        return self._count == self.window
+
+    def update(self, data_point: float) -> float:
+        """
+        Adds the newest data point and returns the updated average.
+        """
+
+        if self._count < self.window:
+            self._count += 1
+            self._weighted += self._count * data_point
+        else:
+            self._weighted += self.window * data_point - self._total
+            self._total -= self._buffer[self._index]
+        self._total += data_point
+        self._buffer[self._index] = data_point
+
+        self._index += 1
+        if self._index == self.window:
+            self._index = 0
+            # recompute the sums once per lap of the buffer so rounding errors cannot accumulate
+            self._total = sum(self._buffer)
+            self._weighted = sum((i + 1) * value for i, value in enumerate(self._buffer))
+
+        self.value = self._weighted / (self._count * (self._count + 1) / 2)
+        return self.value
+
+    def extend(self, data: Iterable[float]) -> Optional[float]:
+        """
+        Adds several data points, oldest first, and returns the latest average.
+        """
+
+        for data_point in data:
+            self.update(data_point)
+        return self.value
+
+
+class RollingMax:
+    """
+    Streaming maximum of the last "window" values, backed by a monotonic deque.
+
+    The deque only keeps values that can still become the maximum (each smaller than the one before it), so each
+    update is amortized O(1) whatever the window. Until "window" values have been seen the maximum is taken over
+    the values seen so far.
+    """
+
+    __slots__ = ("window", "value", "_deque", "_count", "_sign")
+
+    def __init__(self, window: int):
+        """
+        Parameters:
+        - window (int): The number of consecutive data points to take the maximum of.
+        """
+
+        if window <= 0:
+            raise ValueError("window must be a positive integer.")
+
+        self.window = window
+        self.value: Optional[float] = None
+        self._deque: Deque[Tuple[int, float]] = deque()
+        self._count: int = 0
+        self._sign: float = 1.0
+
+    @property
+    def ready(self) -> bool:
+        """True once a full window of values has been seen."""
+        return self._count >= self.window
+
+    def update(self, data_point: float) -> float:
+        """
+        Adds the newest data point and returns the updated maximum.
+        """
+
+        key = self._sign * data_point
+        while self._deque and self._sign * self._deque[-1][1] <= key:
+            self._deque.pop()
+        self._deque.append((self._count, data_point))
+
+        self._count += 1
+        if self._deque[0][0] <= self._count - 1 - self.window:
+            self._deque.popleft()
+
+        self.value = self._deque[0][1]
+        return self.value
+
+    def extend(self, data: Iterable[float]) -> Optional[float]:
+        """
+        Adds several data points, oldest first, and returns the latest maximum.
+        """
+
+        for data_point in data:
+            self.update(data_point)
+        return self.value
+
+
+class RollingMin(RollingMax):
+    """
+    Streaming minimum of the last "window" values, see RollingMax.
+    """
+
+    __slots__ = ()
+
+    def __init__(self, window: int):
+        super().__init__(window)
+        self._sign = -1.0
+
+
+class RollingStandardDeviation:
+    """
+    Streaming standard deviation of the last "window" values, backed by a ring buffer.
+
+    The mean and the sum of squared deviations are kept with Welford updates, a full window replaces its oldest
+    value in one step. Each update is amortized O(1), both are recomputed once per lap of the buffer so rounding
+    errors cannot accumulate. Until "window" values have been seen the values seen so far are measured.
+    """
+
+    __slots__ = ("window", "ddof", "value", "_buffer", "_index", "_count", "_mean", "_deviations")
+
+    def __init__(self, window: int, ddof: int = 0):
+        """
+        Parameters:
+        - window (int): The number of consecutive data points to measure.
+        - ddof (int): Delta degrees of freedom, 0 for the population and 1 for the sample standard deviation.
+        """
+
+        if window <= 0:
+            raise ValueError("window must be a positive integer.")
+
+        self.window = window
+        self.ddof = ddof
+        self.value: Optional[float] = None
+        self._buffer: List[float] = [0.0] * window
+        self._index: int = 0
+        self._count: int = 0
+        self._mean: float = 0.0
+        self._deviations: float = 0.0
+
+    @property
+    def ready(self) -> bool:
+        """True once a full window of values has been seen."""
+        return self._count == self.window
+
+    def update(self, data_point: float) -> float:
+        """
+        Adds the newest data point and returns the updated standard deviation, NaN while at most ddof values have
+        been seen.
+        """
+
+        if self._count < self.window:
+            self._count += 1
+            delta = data_point - self._mean
+            self._mean += delta / self._count
+            self._deviations += delta * (data_point - self._mean)
+        else:
+            oldest = self._buffer[self._index]
+            mean = self._mean + (data_point - oldest) / self.window
+            self._deviations += (data_point - oldest) * (data_point - mean + oldest - self._mean)
+            self._mean = mean
+        self._buffer[self._index] = data_point
+
+        self._index += 1
+        if self._index == self.window:
+            self._index = 0
+            self._mean = sum(self._buffer) / self.window
+            self._deviations = sum((value - self._mean) ** 2 for value in self._buffer)
+
+        if self._count <= self.ddof:
+            self.value = math.nan
+        else:
+            self.value = math.sqrt(max(self._deviations, 0.0) / (self._count - self.ddof))
+        return self.value
+
+    def extend(self, data: Iterable[float]) -> Optional[float]:
+        """
+        Adds several data points, oldest first, and returns the latest standard deviation.
+        """
+
+        for data_point in data:
+            self.update(data_point)
+        return self.value
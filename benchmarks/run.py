@@ -0,0 +1,153 @@
+"""
+Benchmarks the smoothing and backtesting hot paths on synthetic data.
+
+    python -m benchmarks.run                          # time everything, compare with benchmarks/baseline.json
+    python -m benchmarks.run --sizes 1000 100000      # only some series lengths
+    python -m benchmarks.run --save-baseline          # record the current results as the baseline
+
+The exit code is 1 if any benchmark is slower or uses more memory than the baseline allows, or if there is no
+baseline to compare with.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional, Tuple
+
+import algorithms.smoothing as smoothing
+import strategies.backtesting as bt
+from algorithms.cache import default_cache
+from benchmarks.synthetic import SyntheticExchange
+
+SIZES = (1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+# the list functions box every value, so they are only timed up to this many bars
+LIST_LIMIT = 1_000_000
+
+
+def cases(bars: int) -> List[Tuple[str, Callable[[], object]]]:
+    """
+    Returns the (name, function) pairs to time on a series of the given length.
+    """
+
+    exchange = SyntheticExchange(bars)
+    prices = exchange.fetch_closes("BTC/USD")
+    window = min(21, bars)
+
+    benchmarks = [
+        ("smoothing.simple_moving_average_array", lambda: smoothing.simple_moving_average_array(prices, window)),
+        ("smoothing.exponential_moving_average_array",
+         lambda: smoothing.exponential_moving_average_array(prices, 0.1)),
+        ("smoothing.weighted_moving_average_array", lambda: smoothing.weighted_moving_average_array(prices, window)),
+        ("smoothing.rolling_max_array", lambda: smoothing.rolling_max_array(prices, window)),
+        ("smoothing.rolling_min_array", lambda: smoothing.rolling_min_array(prices, window)),
+        ("backtesting.hold", lambda: bt.hold(exchange, "BTC/USD", 1000, "1m", bars)),
+        ("backtesting.simple_moving_average",
+         lambda: bt.simple_moving_average(exchange, "BTC/USD", 1000, window, "1m", bars)),
+        ("backtesting.exponential_moving_average",
+         lambda: bt.exponential_moving_average(exchange, "BTC/USD", 1000, 0.1, "1m", bars)),
+        ("backtesting.moving_average_crossover",
+         lambda: bt.moving_average_crossover(exchange, "BTC/USD", 1000, min(3, window), window, "1m", bars)),
+        ("backtesting.exponential_moving_average_crossover",
+         lambda: bt.exponential_moving_average_crossover(exchange, "BTC/USD", 1000, 0.05, 0.3, "1m", bars)),
+        ("backtesting.weighted_moving_average",
+         lambda: bt.weighted_moving_average(exchange, "BTC/USD", 1000, window, "1m", bars)),
+        ("backtesting.breakout", lambda: bt.breakout(exchange, "BTC/USD", 1000, window, "1m", bars)),
+    ]
+
+    if bars <= LIST_LIMIT:
+        price_list = prices.tolist()
+        benchmarks += [
+            ("smoothing.simple_moving_average", lambda: smoothing.simple_moving_average(price_list, window)),
+            ("smoothing.exponential_moving_average", lambda: smoothing.exponential_moving_average(price_list, 0.1)),
+        ]
+
+    return benchmarks
+
+
+def measure(function: Callable[[], object], repeat: int) -> Tuple[float, int]:
+    """
+    Returns the best wall time (seconds) out of "repeat" runs and the peak memory (bytes) allocated by one run.
+    """
+
+    function()  # warm up lazy imports
+
+    # the backtests memoize their indicators, every run starts cold so the computation itself is timed
+    best = float("inf")
+    for _ in range(repeat):
+        default_cache.clear()
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+
+    # memory is traced in a separate run, tracing slows everything down
+    default_cache.clear()
+    tracemalloc.start()
+    function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return best, peak
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]],
+            tolerance: float) -> List[str]:
+    """
+    Returns a description of every result that is worse than its baseline by more than the tolerance.
+    """
+
+    regressions = []
+    for key, result in results.items():
+        if key not in baseline:
+            continue
+        expected = baseline[key]
+        if result["bars_per_second"] < expected["bars_per_second"] * (1 - tolerance):
+            regressions.append(f"{key}: {result['bars_per_second']:,.0f} bars/s, "
+                               f"baseline {expected['bars_per_second']:,.0f} bars/s")
+        if result["peak_bytes"] > expected["peak_bytes"] * (1 + tolerance):
+            regressions.append(f"{key}: {result['peak_bytes'] / 2**20:,.1f} MB peak, "
+                               f"baseline {expected['peak_bytes'] / 2**20:,.1f} MB")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark smoothing and backtesting on synthetic data.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES), help="series lengths in bars")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per benchmark, the best is kept")
+    parser.add_argument("--baseline", default=BASELINE, help="baseline file to compare with or save to")
+    parser.add_argument("--save-baseline", action="store_true", help="store the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed fractional loss of throughput or growth of memory")
+    arguments = parser.parse_args(argv)
+
+    results: Dict[str, Dict[str, float]] = {}
+    print(f"{'benchmark':<52}{'bars':>12}{'seconds':>12}{'bars/s':>16}{'peak MB':>10}")
+    for bars in arguments.sizes:
+        for name, function in cases(bars):
+            seconds, peak = measure(function, arguments.repeat)
+            results[f"{name}@{bars}"] = {"seconds": seconds, "bars_per_second": bars / seconds, "peak_bytes": peak}
+            print(f"{name:<52}{bars:>12,}{seconds:>12.4f}{bars / seconds:>16,.0f}{peak / 2**20:>10.1f}")
+
+    if arguments.save_baseline:
+        with open(arguments.baseline, "w") as file:
+            json.dump(results, file, indent=2, sort_keys=True)
+        print(f"baseline saved to {arguments.baseline}")
+        return 0
+
+    if not os.path.exists(arguments.baseline):
+        print(f"no baseline at {arguments.baseline}, run with --save-baseline to create one")
+        return 1
+
+    with open(arguments.baseline) as file:
+        regressions = compare(results, json.load(file), arguments.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+import zlib
+from typing import List, Optional
+from data.ohlcv import COLUMNS, OHLCV
+
+import numpy as np
+
+
+def synthetic_ohlcv(bars: int, seed: int = 0, start_price: float = 100.0, volatility: float = 0.001,
+                    timeframe_ms: int = 60_000) -> np.ndarray:
+    """
+    Generates a deterministic OHLCV series following a geometric random walk, no network needed.
+
+    Parameters:
+    - bars (int): Number of candles to generate.
+    - seed (int): Seed of the random generator, the same seed always gives the same series.
+    - start_price (float): Opening price of the first candle.
+    - volatility (float): Standard deviation of the close to close log returns.
+    - timeframe_ms (int): Duration of a candle in milliseconds, 1m by default.
+
+    Returns:
+    - np.ndarray: (bars, 6) array laid out like ccxt's fetch_ohlcv rows: timestamp, open, high, low, close, volume.
+    """
+
+    rng = np.random.default_rng(seed)
+    ohlcv = np.empty((bars, 6))
+
+    close = start_price * np.exp(np.cumsum(rng.normal(0, volatility, bars)))
+    ohlcv[:, 0] = np.arange(bars) * timeframe_ms
+    ohlcv[0, 1] = start_price
+    ohlcv[1:, 1] = close[:-1]
+    ohlcv[:, 4] = close
+
+    # highs and lows stretch a little beyond the open and close
+    spread = np.abs(rng.normal(0, volatility / 2, (2, bars)))
+    ohlcv[:, 2] = np.maximum(ohlcv[:, 1], close) * (1 + spread[0])
+    ohlcv[:, 3] = np.minimum(ohlcv[:, 1], close) * (1 - spread[1])
+    ohlcv[:, 5] = rng.lognormal(3, 1, bars)
+
+    return ohlcv
+
+
+class SyntheticExchange:
+    """
+    Stand-in for a ccxt exchange that serves synthetic_ohlcv candles, every symbol gets its own seed derived from
+    its name, so a symbol's candles do not depend on the order symbols are requested in.
+
+    Like a real exchange, fetch_ohlcv pages through the candles with since/limit and serves at most max_limit
+    candles per call, so paginated loaders can be exercised without a network.
+    """
+
+    id = "synthetic"
+
+    def __init__(self, bars: int, seed: int = 0, max_limit: Optional[int] = None):
+        """
+        Parameters:
+        - bars (int): Number of candles of every symbol, 1m apart starting at timestamp 0.
+        - seed (int): Added to the CRC-32 of every symbol's name to seed its series.
+        - max_limit (int): Maximum number of candles fetch_ohlcv returns per call, None for no cap.
+        """
+
+        self.bars = bars
+        self.seed = seed
+        self.max_limit = max_limit
+        self.requests = 0
+        self._series = {}
+
+    def _columns(self, symbol: str, limit: Optional[int]) -> np.ndarray:
+        # kept column-major so the closes are contiguous
+        if symbol not in self._series:
+            seed = self.seed + zlib.crc32(symbol.encode())
+            self._series[symbol] = np.ascontiguousarray(synthetic_ohlcv(self.bars, seed).T)
+        columns = self._series[symbol]
+        return columns if limit is None else columns[:, -limit:]
+
+    def milliseconds(self) -> int:
+        # the exchange clock stands at the end of the last candle, as if it were still forming
+        return self.bars * 60_000 - 1
+
+    def fetch_arrays(self, symbol: str, timeframe: str = "1m", limit: Optional[int] = None) -> OHLCV:
+        columns = self._columns(symbol, limit)
+        return OHLCV(dict(zip(COLUMNS, columns)))
+
+    def fetch_closes(self, symbol: str, timeframe: str = "1m", limit: Optional[int] = None) -> np.ndarray:
+        return self._columns(symbol, limit)[4]
+
+    def fetch_ohlcv(self, symbol: str, timeframe: str = "1m", since: Optional[int] = None,
+                    limit: Optional[int] = None, params: Optional[dict] = None) -> List[List[float]]:
+        self.requests += 1
+        if self.max_limit is not None:
+            limit = min(limit or self.max_limit, self.max_limit)
+        if since is None:
+            return self._columns(symbol, limit).T.tolist()
+
+        columns = self._columns(symbol, None)
+        start = int(np.searchsorted(columns[0], since))
+        return columns[:, start:start + limit if limit is not None else None].T.tolist()
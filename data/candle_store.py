@@ -0,0 +1,326 @@
+import os
+import shutil
+import time
+from typing import Dict, List, Optional
+from data.ohlcv import COLUMNS, DTYPES, OHLCV, as_ohlcv
+
+import numpy as np
+
+
+def exchange_id(exchange) -> str:
+    """
+    Returns the name used to key an exchange's candles in the store, EX: "coinbase".
+    """
+
+    return getattr(exchange, "id", None) or type(exchange).__name__
+
+
+class CandleStore:
+    """
+    Persistent on-disk store of OHLCV candles keyed by exchange, symbol and timeframe.
+
+    Each column is kept in its own flat binary file (int64 timestamps, float64 prices and volume) so the
+    history can be memory-mapped straight into NumPy arrays. Syncing only downloads candles newer than
+    the last stored timestamp.
+    """
+
+    def __init__(self, root: str, page_limit: int = 1000):
+        """
+        Parameters:
+        - root (str): Directory the candle files are written to.
+        - page_limit (int): Maximum number of candles requested from the exchange per call.
+        """
+
+        self.root = root
+        self.page_limit = page_limit
+        self._exhausted = set()  # series the exchange has no older candles for
+
+    def path(self, exchange_id: str, symbol: str, timeframe: str) -> str:
+        """
+        Returns the directory holding the column files for one candle series.
+        """
+
+        return os.path.join(self.root, exchange_id, symbol.replace("/", "-"), timeframe)
+
+    def load(self, exchange_id: str, symbol: str, timeframe: str) -> OHLCV:
+        """
+        Memory-maps a stored candle series.
+
+        Parameters:
+        - exchange_id (str): Name of the exchange the candles came from. EX: "coinbase".
+        - symbol (str): Asset the candles belong to. EX: "BTC/USD".
+        - timeframe (str): minutes (1m), days (1d), etc..
+
+        Returns:
+        - OHLCV: Read-only candles, oldest first. Each column is kept in its own file (see OHLCV.load), a write
+          interrupted half way leaves some columns longer than others and only complete rows are used.
+        """
+
+        return OHLCV.load(self.path(exchange_id, symbol, timeframe))
+
+    def last_timestamp(self, exchange_id: str, symbol: str, timeframe: str) -> Optional[int]:
+        """
+        Returns the timestamp (ms) of the newest stored candle, or None if nothing is stored yet.
+        """
+
+        timestamps = self.load(exchange_id, symbol, timeframe)["timestamp"]
+        return int(timestamps[-1]) if len(timestamps) else None
+
+    def write(self, exchange_id: str, symbol: str, timeframe: str, ohlcv: List[List]) -> int:
+        """
+        Merges freshly downloaded candles into the store.
+
+        Candles older than the newest stored candle are ignored. A candle with the same timestamp as the
+        newest stored candle replaces it, since the exchange may have served it while it was still forming.
+
+        Parameters:
+        - exchange_id (str): Name of the exchange the candles came from. EX: "coinbase".
+        - symbol (str): Asset the candles belong to. EX: "BTC/USD".
+        - timeframe (str): minutes (1m), days (1d), etc..
+        - ohlcv (List[List]): Candles as returned by ccxt's fetch_ohlcv.
+
+        Returns:
+        - int: Number of candles appended to the store.
+        """
+
+        if len(ohlcv) == 0:
+            return 0
+
+        directory = self.path(exchange_id, symbol, timeframe)
+        os.makedirs(directory, exist_ok=True)
+
+        rows = np.asarray(ohlcv, dtype=np.float64)
+        timestamps = rows[:, 0].astype(np.int64)
+
+        # sort and dedupe the batch, keeping the last copy of any repeated candle
+        reversed_unique = np.unique(timestamps[::-1], return_index=True)[1]
+        keep = len(timestamps) - 1 - reversed_unique
+        rows, timestamps = rows[keep], timestamps[keep]
+
+        stored = self.load(exchange_id, symbol, timeframe)
+        length = len(stored["timestamp"])
+        last = int(stored["timestamp"][-1]) if length else None
+        del stored  # release the memory maps before the files are modified
+
+        if last is not None:
+            # overwrite the newest stored candle in place if the exchange sent it again
+            if timestamps[0] <= last and last in timestamps:
+                row = rows[np.flatnonzero(timestamps == last)[0]]
+                self._write_columns(directory, row[np.newaxis, :], np.array([last], dtype=np.int64),
+                                    offset=length - 1)
+            newer = timestamps > last
+            rows, timestamps = rows[newer], timestamps[newer]
+
+        self._write_columns(directory, rows, timestamps, offset=length)
+        return len(timestamps)
+
+    def sync(self, exchange, symbol: str, timeframe: str, limit: Optional[int] = None) -> OHLCV:
+        """
+        Brings a stored candle series up to date and returns it.
+
+        An empty series is seeded with the most recent "limit" candles, and a series holding fewer than "limit"
+        candles is backfilled with older ones, both through data.history so any depth can be requested. Afterwards
+        only candles from the last stored timestamp onwards are requested, so an up to date series costs a single
+        small request.
+
+        Parameters:
+        - exchange (ccxt.exchange): Exchange we wish to download candles from.
+        - symbol (str): Asset we want candles for. EX: "BTC/USD".
+        - timeframe (str): minutes (1m), days (1d), etc..
+        - limit (int): number of candles the series should hold at least. Defaults to page_limit.
+
+        Returns:
+        - OHLCV: The stored series, see load.
+        """
+
+        # imported here, data.history depends on this module
+        from data.history import fetch_history
+
+        name = exchange_id(exchange)
+        stored = self.load(name, symbol, timeframe)
+        length = len(stored["timestamp"])
+        first = int(stored["timestamp"][0]) if length else None
+        del stored
+
+        if length == 0:
+            history = fetch_history(exchange, symbol, timeframe, limit=limit or self.page_limit,
+                                    page_limit=self.page_limit)
+            self.write(name, symbol, timeframe, np.column_stack(history.candles.values()))
+            return self.load(name, symbol, timeframe)
+
+        if limit is not None and length < limit and (name, symbol, timeframe) not in self._exhausted:
+            history = fetch_history(exchange, symbol, timeframe, until=first, limit=limit - length,
+                                    page_limit=self.page_limit)
+            if len(history) < limit - length:
+                # load_history only stops short when the exchange has nothing older, do not ask again
+                self._exhausted.add((name, symbol, timeframe))
+            self._prepend(name, symbol, timeframe, history.candles)
+
+        last = self.last_timestamp(name, symbol, timeframe)
+        while True:
+            ohlcv = exchange.fetch_ohlcv(symbol, timeframe, since=last, limit=self.page_limit)
+            appended = self.write(name, symbol, timeframe, ohlcv)
+
+            # stop once the exchange has nothing newer, or served less than a full page
+            if appended == 0 or len(ohlcv) < self.page_limit:
+                break
+            last = self.last_timestamp(name, symbol, timeframe)
+
+        return self.load(name, symbol, timeframe)
+
+    def _prepend(self, exchange_id: str, symbol: str, timeframe: str, older: OHLCV) -> None:
+        # rewrites the series with older candles in front, backfills are rare so the copy is acceptable
+        stored = self.load(exchange_id, symbol, timeframe)
+        keep = older["timestamp"] < (stored["timestamp"][0] if len(stored["timestamp"]) else np.iinfo(np.int64).max)
+        if not keep.any():
+            return
+
+        rows = np.column_stack([np.concatenate((older[column][keep], stored[column])) for column in COLUMNS])
+        timestamps = np.concatenate((older["timestamp"][keep], stored["timestamp"]))
+        del stored  # release the memory maps before the files are modified
+
+        # write the new series next to the old one and swap the directories, an interrupted backfill at worst
+        # loses the series (it is downloaded again) instead of leaving columns that disagree
+        directory = self.path(exchange_id, symbol, timeframe)
+        for leftover in (directory + ".new", directory + ".old"):  # left behind by an interrupted backfill
+            shutil.rmtree(leftover, ignore_errors=True)
+        os.makedirs(directory + ".new")
+        self._write_columns(directory + ".new", rows, timestamps, offset=0)
+        os.replace(directory, directory + ".old")
+        os.replace(directory + ".new", directory)
+        shutil.rmtree(directory + ".old")
+
+    def _write_columns(self, directory: str, rows: np.ndarray, timestamps: np.ndarray, offset: int) -> None:
+        if len(timestamps) == 0:
+            return
+
+        # timestamps are written last so an interrupted write never exposes a partial row
+        for index, column in reversed(list(enumerate(COLUMNS))):
+            values = timestamps if column == "timestamp" else rows[:, index]
+            path = os.path.join(directory, column)
+            with open(path, "r+b" if os.path.exists(path) else "wb") as file:
+                file.seek(offset * np.dtype(DTYPES[column]).itemsize)
+                file.write(np.ascontiguousarray(values, dtype=DTYPES[column]).tobytes())
+                file.truncate()
+
+
+class CachedExchange:
+    """
+    Wraps a ccxt exchange so every fetch_ohlcv call is served from a CandleStore.
+
+    The first request for a series downloads it, later requests only download newer candles. Anything other
+    than fetch_ohlcv is forwarded to the wrapped exchange.
+    """
+
+    def __init__(self, exchange, store: CandleStore, refresh_interval: float = 60.0):
+        """
+        Parameters:
+        - exchange (ccxt.exchange): Exchange we wish to download candles from.
+        - store (CandleStore): Where the candles are kept between runs.
+        - refresh_interval (float): Seconds a synced series is considered fresh, repeated requests within this
+          interval do not touch the network.
+        """
+
+        self.exchange = exchange
+        self.store = store
+        self.refresh_interval = refresh_interval
+        self._synced: Dict[tuple, float] = {}
+
+    def __getattr__(self, name):
+        return getattr(self.exchange, name)
+
+    def fetch_arrays(self, symbol: str, timeframe: str = "1m", limit: Optional[int] = None) -> OHLCV:
+        """
+        Returns the most recent "limit" candles, syncing the store first if needed.
+
+        Parameters:
+        - symbol (str): Asset we want candles for. EX: "BTC/USD".
+        - timeframe (str): minutes (1m), days (1d), etc..
+        - limit (int): number of candles to return, all stored candles if None.
+
+        Returns:
+        - OHLCV: Read-only views of the stored candles, oldest first.
+        """
+
+        key = (symbol, timeframe)
+        now = time.monotonic()
+
+        candles = None
+        if key in self._synced and now - self._synced[key] < self.refresh_interval:
+            candles = self.store.load(exchange_id(self.exchange), symbol, timeframe)
+            if limit is not None and len(candles) < limit:
+                candles = None  # fresh, but not deep enough: sync to backfill
+        if candles is None:
+            candles = self.store.sync(self.exchange, symbol, timeframe, limit)
+            self._synced[key] = now
+
+        return candles if limit is None else candles[-limit:]
+
+    def fetch_closes(self, symbol: str, timeframe: str = "1m", limit: Optional[int] = None) -> np.ndarray:
+        """
+        Returns the closing prices of the most recent "limit" candles without copying them.
+        """
+
+        return self.fetch_arrays(symbol, timeframe, limit)["close"]
+
+    def fetch_ohlcv(self, symbol: str, timeframe: str = "1m", since: Optional[int] = None,
+                    limit: Optional[int] = None, params: Optional[dict] = None) -> List[List]:
+        """
+        Drop-in replacement for ccxt's fetch_ohlcv that is served from the store.
+        """
+
+        candles = self.fetch_arrays(symbol, timeframe, None if since is not None else limit)
+
+        if since is not None:
+            start = int(np.searchsorted(candles.timestamp, since))
+            candles = candles[start:] if limit is None else candles[start:start + limit]
+
+        return candles.rows()
+
+
+def fetch_candles(exchange, symbol: str, timeframe: str, limit: Optional[int]) -> OHLCV:
+    """
+    Returns the most recent "limit" candles of a symbol.
+
+    Exchanges that serve arrays (EX: a CachedExchange) hand them out without copying, any other ccxt exchange is
+    asked for a fresh download. Whenever the exchange serves fewer candles than requested (EX: coinbase caps pages
+    at 300 candles), the rest is paged in backwards through data.history until "limit" candles are loaded or the
+    exchange has no older ones.
+
+    Parameters:
+    - exchange (ccxt.exchange): Exchange we wish to trade on.
+    - symbol (str): Asset we want candles for. EX: "BTC/USD".
+    - timeframe (str): minutes (1m), days (1d), etc..
+    - limit (int): number of candles, None for whatever the exchange serves by default.
+
+    Returns:
+    - OHLCV: The candles, oldest first.
+    """
+
+    if hasattr(exchange, "fetch_arrays"):
+        return as_ohlcv(exchange.fetch_arrays(symbol, timeframe, limit))
+
+    # imported here, data.history depends on this module
+    from data.history import PAGE_LIMIT, fetch_history
+
+    if limit is not None and limit > PAGE_LIMIT:
+        return fetch_history(exchange, symbol, timeframe, limit=limit).candles[-limit:]
+
+    candles = OHLCV.from_rows(exchange.fetch_ohlcv(symbol, timeframe, limit=limit))
+    if limit is None or len(candles) == 0 or len(candles) >= limit:
+        return candles if limit is None else candles[-limit:]
+
+    # a short page: load the candles before the oldest one served, in pages of the size the exchange just served
+    older = fetch_history(exchange, symbol, timeframe, until=int(candles.timestamp.min()), limit=limit - len(candles),
+                          page_limit=len(candles))
+    return OHLCV.concatenate([older.candles, candles])
+
+
+def fetch_closes(exchange, symbol: str, timeframe: str, limit: int) -> np.ndarray:
+    """
+    Returns the closing prices of the most recent "limit" candles of a symbol, see fetch_candles.
+    """
+
+    if hasattr(exchange, "fetch_closes"):
+        return exchange.fetch_closes(symbol, timeframe, limit)
+    return fetch_candles(exchange, symbol, timeframe, limit).close
@@ -0,0 +1,162 @@
+import time
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+from data.ohlcv import COLUMNS, DTYPES, OHLCV
+from data.rate_limit import RateLimiter
+from data.resample import timeframe_ms
+
+import asyncio
+import numpy as np
+
+# candles requested per call, most exchanges serve at least this many
+PAGE_LIMIT = 1000
+
+
+@dataclass
+class History:
+    """Candles downloaded by load_history."""
+    candles: OHLCV  # oldest first
+    gaps: List[Tuple[int, int]]  # [start, stop) timestamps (ms) of runs of missing candles between the first and last
+    requests: int  # number of fetch_ohlcv calls made
+
+    def __len__(self) -> int:
+        return len(self.candles)
+
+
+async def load_history(exchange, symbol: str, timeframe: str = "1m", since: Optional[int] = None,
+                       until: Optional[int] = None, limit: Optional[int] = None, page_limit: int = PAGE_LIMIT,
+                       concurrency: int = 4, rate_limit: Optional[float] = None) -> History:
+    """
+    Downloads a long candle history in pages, fetching pages concurrently.
+
+    A range is split into pages of page_limit candles up front, so every page knows its own "since" and all of
+    them can be requested at once. Each candle is written straight into its slot of a preallocated array, which
+    dedupes overlapping pages. A page the exchange serves only partially (EX: it caps requests at 300 candles) is
+    continued from its last candle.
+
+    Without since, the last "limit" candles are loaded the way ccxt serves them: the exchange's most recent candles
+    (which need not reach the current time), then pages backwards from the oldest candle received until "limit"
+    candles are collected. Gappy series (EX: illiquid minute bars) are paged further back, only a page without a
+    single candle ends the history early.
+
+    Parameters:
+    - exchange (ccxt.exchange): Exchange to download from, ccxt.async_support exchanges are awaited and synchronous
+      ones run on worker threads.
+    - symbol (str): Asset we want candles for. EX: "BTC/USD".
+    - timeframe (str): minutes (1m), days (1d), etc..
+    - since (int): Timestamp (ms) of the first candle, the last "limit" candles before until if None.
+    - until (int): Timestamp (ms) the history ends before, defaults to the end of the candle currently forming.
+    - limit (int): Number of candles to load when since is not given.
+    - page_limit (int): Maximum number of candles requested per call.
+    - concurrency (int): Maximum number of requests in flight at once.
+    - rate_limit (float): Maximum number of requests started per second, None for no limit.
+
+    Returns:
+    - History: The candles, the gaps between them and the number of requests made. Fewer than "limit" candles
+      only if the exchange has no older ones.
+    """
+
+    if since is None and limit is None:
+        raise ValueError("either since or limit is required")
+
+    period = timeframe_ms(timeframe)
+    semaphore = asyncio.Semaphore(concurrency)
+    limiter = RateLimiter(rate_limit)
+    requests = 0
+
+    async def fetch(cursor: Optional[int], count: int) -> np.ndarray:
+        nonlocal requests
+        async with semaphore:
+            await limiter.acquire()
+            requests += 1
+            if asyncio.iscoroutinefunction(exchange.fetch_ohlcv):
+                ohlcv = await exchange.fetch_ohlcv(symbol, timeframe, since=cursor, limit=count)
+            else:
+                ohlcv = await asyncio.to_thread(exchange.fetch_ohlcv, symbol, timeframe, since=cursor, limit=count)
+        return np.asarray(ohlcv, dtype=np.float64).reshape(-1, 6)
+
+    async def load_range(since: int, until: int) -> OHLCV:
+        since -= since % period
+        length = max(0, -(-(until - since) // period))
+
+        # every candle has a slot given by its timestamp, filled marks the slots a page has written to
+        columns = {column: np.empty(length, dtype=DTYPES[column]) for column in COLUMNS}
+        filled = np.zeros(length, dtype=bool)
+
+        async def load_page(start: int, stop: int) -> None:
+            cursor = start
+            while cursor < stop:
+                rows = await fetch(cursor, min(page_limit, -(-(stop - cursor) // period)))
+                if len(rows) == 0:
+                    break
+
+                timestamps = rows[:, 0].astype(np.int64)
+                slots = (timestamps - since) // period
+                inside = (slots >= 0) & (slots < length)
+                for index, column in enumerate(COLUMNS):
+                    values = timestamps[inside] if column == "timestamp" else rows[inside, index]
+                    columns[column][slots[inside]] = values
+                filled[slots[inside]] = True
+
+                # continue after the newest candle if the exchange served less than the page
+                newest = int(timestamps.max()) + period
+                if newest <= cursor:
+                    break
+                cursor = newest
+
+        page = page_limit * period
+        await asyncio.gather(*[load_page(start, min(start + page, until)) for start in range(since, until, page)])
+        return OHLCV(columns)[filled]
+
+    if since is not None:
+        if until is None:
+            until = _forming_candle_end(exchange, period)
+        candles = await load_range(since, until)
+    else:
+        candles = OHLCV()
+        if until is None:
+            # ccxt's "last N candles": the exchange decides where its series ends
+            rows = await fetch(None, min(limit, page_limit))
+            if len(rows) == 0:
+                return History(candles, [], requests)
+            candles = _sorted_rows(rows)
+            until = int(candles.timestamp[0])
+
+        # page backwards from the oldest candle until there are enough. a round spans at least a full page, so only
+        # a page without a single candle ends the history
+        while len(candles) < limit:
+            older = await load_range(until - max(limit - len(candles), page_limit) * period, until)
+            if len(older) == 0:
+                break
+            candles = OHLCV.concatenate([older, candles])
+            until = int(candles.timestamp[0])
+        candles = candles[-limit:]
+
+    # runs of missing candles between the first and the last one
+    timestamps = candles.timestamp
+    breaks = np.flatnonzero(np.diff(timestamps) > period)
+    gaps = [(int(timestamps[i]) + period, int(timestamps[i + 1])) for i in breaks.tolist()]
+    return History(candles, gaps, requests)
+
+
+def _forming_candle_end(exchange, period: int) -> int:
+    now = exchange.milliseconds() if hasattr(exchange, "milliseconds") else int(time.time() * 1000)
+    return (now // period + 1) * period
+
+
+def _sorted_rows(rows: np.ndarray) -> OHLCV:
+    # sorts a page and dedupes it, keeping the last copy of any repeated candle
+    timestamps = rows[:, 0].astype(np.int64)
+    keep = len(timestamps) - 1 - np.unique(timestamps[::-1], return_index=True)[1]
+    return OHLCV.from_rows(rows[keep])
+
+
+def fetch_history(exchange, symbol: str, timeframe: str = "1m", since: Optional[int] = None,
+                  until: Optional[int] = None, limit: Optional[int] = None, page_limit: int = PAGE_LIMIT,
+                  concurrency: int = 4, rate_limit: Optional[float] = None) -> History:
+    """
+    Synchronous load_history, for callers outside of an event loop.
+    """
+
+    return asyncio.run(load_history(exchange, symbol, timeframe, since, until, limit, page_limit, concurrency,
+                                    rate_limit))
@@ -0,0 +1,210 @@
+import os
+from typing import Iterator, List, Mapping, Optional, Tuple, Union
+from instrumentation import metrics
+
+import numpy as np
+
+# column layout of a ccxt OHLCV row
+COLUMNS = ("timestamp", "open", "high", "low", "close", "volume")
+DTYPES = {column: (np.int64 if column == "timestamp" else np.float64) for column in COLUMNS}
+
+
+class OHLCV:
+    """
+    Candles stored as one typed contiguous array per column: int64 timestamps (ms), float64 prices and volume.
+
+    A million candles take 48MB (46MiB), against roughly 250MB as ccxt's list of lists of boxed floats. Columns are
+    read by name (candles["close"] or candles.close) as views and slicing (candles[-365:]) returns an OHLCV of views.
+
+    An OHLCV is not an array: np.asarray(candles) raises TypeError rather than guess a column, pass candles.close
+    (or any other column) to the smoothing functions and strategies, np.column_stack(candles.values()) for rows.
+    """
+
+    __slots__ = ("_buffers", "_length")
+
+    def __init__(self, columns: Optional[Mapping[str, np.ndarray]] = None):
+        """
+        Parameters:
+        - columns (Mapping[str, np.ndarray]): An array per column in COLUMNS, EX: another OHLCV. Arrays that already
+          have the column's dtype are used without copying. Empty if None.
+        """
+
+        if columns is None:
+            self._buffers = {column: np.empty(0, dtype=DTYPES[column]) for column in COLUMNS}
+        else:
+            self._buffers = {column: np.asarray(columns[column], dtype=DTYPES[column]) for column in COLUMNS}
+
+        lengths = {len(values) for values in self._buffers.values()}
+        if len(lengths) > 1:
+            raise ValueError(f"columns differ in length: {sorted(lengths)}")
+        self._length = lengths.pop()
+
+    @classmethod
+    @metrics.timed("convert")
+    def from_rows(cls, rows) -> "OHLCV":
+        """
+        Converts ccxt's fetch_ohlcv rows (a list of [timestamp, open, high, low, close, volume]) or an (n, 6) array.
+        """
+
+        rows = np.asarray(rows, dtype=np.float64).reshape(-1, len(COLUMNS))
+        return cls({column: np.ascontiguousarray(rows[:, i]) for i, column in enumerate(COLUMNS)})
+
+    @classmethod
+    def load(cls, directory: str, mode: str = "r") -> "OHLCV":
+        """
+        Memory-maps candles written by save, one file per column. Only complete rows are used if a write was
+        interrupted and left some columns longer than others.
+
+        Parameters:
+        - directory (str): Directory holding the column files.
+        - mode (str): numpy.memmap mode, "r" for read-only views, "c" for copy-on-write.
+
+        Returns:
+        - OHLCV: The candles, backed by the files.
+        """
+
+        sizes = {}
+        for column in COLUMNS:
+            path = os.path.join(directory, column)
+            sizes[column] = os.path.getsize(path) // np.dtype(DTYPES[column]).itemsize if os.path.exists(path) else 0
+        length = min(sizes.values())
+
+        if length == 0:
+            return cls()
+        return cls({column: np.memmap(os.path.join(directory, column), dtype=DTYPES[column], mode=mode,
+                                      shape=(length,)) for column in COLUMNS})
+
+    def save(self, directory: str) -> None:
+        """
+        Writes every column to its own flat binary file in a directory, see load.
+        """
+
+        os.makedirs(directory, exist_ok=True)
+
+        # timestamps are written last, load only trusts rows that every column has
+        for column in reversed(COLUMNS):
+            getattr(self, column).tofile(os.path.join(directory, column))
+
+    def append(self, candles: Union["OHLCV", Mapping[str, np.ndarray], List[List]]) -> "OHLCV":
+        """
+        Appends candles in place and returns self. Capacity grows geometrically, so appending one candle at a time
+        is amortized constant time. Views taken before an append keep showing the candles they were taken of.
+
+        Parameters:
+        - candles (OHLCV): Candles to add after the last one, as an OHLCV, column arrays or ccxt rows.
+        """
+
+        if not isinstance(candles, (OHLCV, Mapping)):
+            candles = OHLCV.from_rows(candles)
+        added = len(candles["timestamp"])
+        length = self._length + added
+
+        capacity = len(self._buffers["timestamp"])
+        if length > capacity:
+            # move into buffers of our own with room to grow, the spare room of arrays handed in is never used
+            capacity = max(length, 2 * capacity, 16)
+            for column in COLUMNS:
+                buffer = np.empty(capacity, dtype=DTYPES[column])
+                buffer[:self._length] = self._buffers[column][:self._length]
+                self._buffers[column] = buffer
+
+        for column in COLUMNS:
+            self._buffers[column][self._length:length] = candles[column]
+        self._length = length
+        return self
+
+    @staticmethod
+    def concatenate(parts: List[Union["OHLCV", Mapping[str, np.ndarray]]]) -> "OHLCV":
+        """
+        Joins candles end to end into a new OHLCV.
+        """
+
+        return OHLCV({column: np.concatenate([part[column] for part in parts]) for column in COLUMNS})
+
+    def rows(self) -> List[List]:
+        """
+        Returns the candles as ccxt fetch_ohlcv rows.
+        """
+
+        return [list(row) for row in zip(*(getattr(self, column).tolist() for column in COLUMNS))]
+
+    def copy(self) -> "OHLCV":
+        return OHLCV({column: values.copy() for column, values in self.items()})
+
+    @property
+    def nbytes(self) -> int:
+        return sum(values.nbytes for values in self.values())
+
+    @property
+    def timestamp(self) -> np.ndarray:
+        return self._buffers["timestamp"][:self._length]
+
+    @property
+    def open(self) -> np.ndarray:
+        return self._buffers["open"][:self._length]
+
+    @property
+    def high(self) -> np.ndarray:
+        return self._buffers["high"][:self._length]
+
+    @property
+    def low(self) -> np.ndarray:
+        return self._buffers["low"][:self._length]
+
+    @property
+    def close(self) -> np.ndarray:
+        return self._buffers["close"][:self._length]
+
+    @property
+    def volume(self) -> np.ndarray:
+        return self._buffers["volume"][:self._length]
+
+    def keys(self) -> Tuple[str, ...]:
+        return COLUMNS
+
+    def values(self) -> List[np.ndarray]:
+        return [getattr(self, column) for column in COLUMNS]
+
+    def items(self) -> List[Tuple[str, np.ndarray]]:
+        return [(column, getattr(self, column)) for column in COLUMNS]
+
+    def __getitem__(self, key):
+        # a column name gives the column, anything else (a slice, indices, a mask) selects candles
+        if isinstance(key, str):
+            if key not in DTYPES:
+                raise KeyError(key)
+            return getattr(self, key)
+        if isinstance(key, (int, np.integer)):
+            key = slice(key, key + 1 or None)
+        return OHLCV({column: getattr(self, column)[key] for column in COLUMNS})
+
+    def __contains__(self, column: str) -> bool:
+        return column in DTYPES
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __iter__(self) -> Iterator[str]:
+        # iterating like a mapping of columns, so dict(candles) and {**candles} work
+        return iter(COLUMNS)
+
+    def __array__(self, dtype=None, copy=None) -> np.ndarray:
+        # without this NumPy would treat the candles as a sequence of column names
+        raise TypeError("an OHLCV holds several columns, convert one of them, EX: np.asarray(candles.close)")
+
+    def __repr__(self) -> str:
+        if self._length == 0:
+            return "OHLCV(0 candles)"
+        return f"OHLCV({self._length} candles, {int(self.timestamp[0])} to {int(self.timestamp[-1])})"
+
+
+def as_ohlcv(candles: Union[OHLCV, Mapping[str, np.ndarray], List[List]]) -> OHLCV:
+    """
+    Returns candles given as an OHLCV, column arrays or ccxt rows as an OHLCV, without copying if possible.
+    """
+
+    if isinstance(candles, OHLCV):
+        return candles
+    if isinstance(candles, Mapping):
+        return OHLCV(candles)
+    return OHLCV.from_rows(candles)
@@ -0,0 +1,40 @@
+import asyncio
+from typing import Optional
+
+
+class RateLimiter:
+    """
+    Token bucket that spaces out requests to an exchange.
+
+    Up to "burst" requests may start back to back, after that requests start at most "rate" times per second.
+    """
+
+    def __init__(self, rate: Optional[float], burst: int = 1):
+        """
+        Parameters:
+        - rate (float): Sustained number of requests per second, None disables the limit.
+        - burst (int): Number of requests that may start at once after an idle period.
+        """
+
+        self.interval: float = 1 / rate if rate else 0.0
+        self.burst = max(1, burst)
+        self._next_slot: float = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+
+    async def acquire(self) -> None:
+        """Waits until the next request may start."""
+
+        if not self.interval:
+            return
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        async with self._lock:
+            now = asyncio.get_running_loop().time()
+
+            # unused capacity only accumulates up to "burst" requests
+            slot = max(self._next_slot, now - (self.burst - 1) * self.interval)
+            self._next_slot = slot + self.interval
+
+        if slot > now:
+            await asyncio.sleep(slot - now)
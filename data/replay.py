@@ -0,0 +1,158 @@
+import time
+from typing import Dict, List, Mapping, Optional
+from data.candle_store import CandleStore
+from data.ohlcv import OHLCV, as_ohlcv
+from data.resample import timeframe_ms
+
+import numpy as np
+
+
+class ReplayExchange:
+    """
+    Stand-in for a ccxt exchange that replays recorded candles against a simulated clock, no network needed.
+
+    The clock stands at the close of one bar of the timeline (every timestamp any symbol has a candle at) and only
+    the candles up to that bar are served, the newest one being the candle of the current bar. advance moves the
+    clock to the next bar, so the live strategies can be driven bar by bar, see strategies.replay.
+
+    Candles are served as views of the recording, only of the recorded timeframe. Wrap the exchange in a
+    data.resample.ResamplingExchange to serve higher timeframes, EX: the "1d" candles of the live strategies from a
+    "1m" recording, anything other than fetch_* is forwarded to the ReplayExchange.
+    """
+
+    id = "replay"
+
+    def __init__(self, candles: Mapping[str, OHLCV], timeframe: str = "1m", speed: Optional[float] = None,
+                 start: Optional[int] = None):
+        """
+        Parameters:
+        - candles (Mapping[str, OHLCV]): Recorded candles of every symbol, oldest first. EX: {"BTC/USD": ...}
+        - timeframe (str): Timeframe of the recorded candles.
+        - speed (float): Simulated time that passes per second of real time, EX: 60 replays a minute per second.
+          None replays as fast as possible.
+        - start (int): Timestamp (ms) of the bar the clock starts at, defaults to the first bar.
+        """
+
+        self.candles: Dict[str, OHLCV] = {symbol: as_ohlcv(series) for symbol, series in candles.items()}
+        self.timeframe = timeframe
+        self.speed = speed
+        self.period = timeframe_ms(timeframe)
+
+        # every bar any symbol has a candle at, in order
+        self.timestamps = np.unique(np.concatenate([series.timestamp for series in self.candles.values()]
+                                                   or [np.empty(0, dtype=np.int64)]))
+        if len(self.timestamps) == 0:
+            raise ValueError("no candles to replay")
+
+        self.bar = 0 if start is None else int(np.searchsorted(self.timestamps, start))
+        self._anchor: Optional[tuple] = None
+
+    @classmethod
+    def from_store(cls, store: CandleStore, exchange_id: str, symbols: List[str], timeframe: str = "1m",
+                   speed: Optional[float] = None, start: Optional[int] = None) -> "ReplayExchange":
+        """
+        Replays candles recorded by a data.candle_store.CandleStore, memory-mapped rather than read into memory.
+
+        Parameters:
+        - store (CandleStore): Store the candles were recorded into.
+        - exchange_id (str): Exchange the candles were recorded from. EX: "coinbase".
+        - symbols (List[str]): Symbols to replay. EX: ["BTC/USD", "DOGE/USD"]
+        - timeframe (str): Timeframe of the recorded candles.
+        - speed (float): See ReplayExchange.
+        - start (int): See ReplayExchange.
+        """
+
+        return cls({symbol: store.load(exchange_id, symbol, timeframe) for symbol in symbols}, timeframe, speed,
+                   start)
+
+    @property
+    def timestamp(self) -> int:
+        """Timestamp (ms) of the current bar."""
+        return int(self.timestamps[self.bar])
+
+    @property
+    def done(self) -> bool:
+        """True once the clock stands at the last bar."""
+        return self.bar == len(self.timestamps) - 1
+
+    def milliseconds(self) -> int:
+        # the clock stands at the end of the current bar, as if its candle were still forming
+        return self.timestamp + self.period - 1
+
+    def seek(self, timestamp: int) -> None:
+        """
+        Moves the clock to the bar at or after a timestamp (ms), backwards too.
+        """
+
+        self.bar = min(int(np.searchsorted(self.timestamps, timestamp)), len(self.timestamps) - 1)
+        self._anchor = None
+
+    def advance(self) -> bool:
+        """
+        Moves the clock to the next bar. With a speed set, waits until that much real time has passed since the
+        first advance.
+
+        Returns:
+        - bool: False if the clock already stood at the last bar and did not move.
+        """
+
+        if self.done:
+            return False
+        if self._anchor is None:
+            self._anchor = (time.perf_counter(), self.timestamp)
+        self.bar += 1
+
+        if self.speed is not None:
+            started, timestamp = self._anchor
+            delay = (self.timestamp - timestamp) / 1000 / self.speed - (time.perf_counter() - started)
+            if delay > 0:
+                time.sleep(delay)
+        return True
+
+    def fetch_arrays(self, symbol: str, timeframe: str = "1m", limit: Optional[int] = None) -> OHLCV:
+        """
+        Returns the most recent "limit" candles up to the current bar.
+
+        Parameters:
+        - symbol (str): Asset we want candles for. EX: "BTC/USD".
+        - timeframe (str): Must be the recorded timeframe.
+        - limit (int): number of candles to return, all candles up to the current bar if None.
+
+        Returns:
+        - OHLCV: Views of the recorded candles, oldest first.
+        """
+
+        candles = self._visible(symbol, timeframe)
+        return candles if limit is None else candles[-limit:]
+
+    def fetch_closes(self, symbol: str, timeframe: str = "1m", limit: Optional[int] = None) -> np.ndarray:
+        """
+        Returns the closing prices of the most recent "limit" candles up to the current bar without copying them.
+        """
+
+        return self.fetch_arrays(symbol, timeframe, limit)["close"]
+
+    def fetch_ohlcv(self, symbol: str, timeframe: str = "1m", since: Optional[int] = None,
+                    limit: Optional[int] = None, params: Optional[dict] = None) -> List[List]:
+        """
+        Drop-in replacement for ccxt's fetch_ohlcv that is served from the recording.
+        """
+
+        candles = self._visible(symbol, timeframe)
+        if since is not None:
+            start = int(np.searchsorted(candles.timestamp, since))
+            candles = candles[start:] if limit is None else candles[start:start + limit]
+        elif limit is not None:
+            candles = candles[-limit:]
+
+        return candles.rows()
+
+    def _visible(self, symbol: str, timeframe: str) -> OHLCV:
+        if timeframe != self.timeframe:
+            raise ValueError(f"only {self.timeframe} candles were recorded, wrap the exchange in a "
+                             f"data.resample.ResamplingExchange to serve {timeframe}")
+        if symbol not in self.candles:
+            raise KeyError(f"no candles recorded for {symbol}")
+
+        candles = self.candles[symbol]
+        return candles[:int(np.searchsorted(candles.timestamp, self.timestamp, side="right"))]
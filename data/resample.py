@@ -0,0 +1,180 @@
+from typing import List, Mapping, Optional
+from data.candle_store import fetch_candles
+from data.ohlcv import OHLCV, as_ohlcv
+
+import numpy as np
+
+# milliseconds per timeframe unit, as used in ccxt timeframes ("5m", "4h", "1d", "1w")
+TIMEFRAME_UNITS = {"s": 1_000, "m": 60_000, "h": 3_600_000, "d": 86_400_000, "w": 604_800_000}
+
+# weekly candles start on Monday like exchange candles, the epoch (1970-01-01) was a Thursday
+WEEK_OFFSET = 4 * TIMEFRAME_UNITS["d"]
+
+
+def timeframe_ms(timeframe: str) -> int:
+    """
+    Returns the duration of a timeframe in milliseconds, EX: timeframe_ms("5m") == 300000.
+    """
+
+    amount, unit = timeframe[:-1], timeframe[-1]
+    if unit not in TIMEFRAME_UNITS or not amount.isdigit() or int(amount) <= 0:
+        raise ValueError(f"unsupported timeframe {timeframe!r}")
+    return int(amount) * TIMEFRAME_UNITS[unit]
+
+
+def period_start(timestamps: np.ndarray, timeframe: str) -> np.ndarray:
+    """
+    Returns the start (ms) of the timeframe period every timestamp falls in. Periods are aligned to the epoch,
+    except weeks, which start on Monday 00:00 UTC.
+    """
+
+    offset = WEEK_OFFSET if timeframe.endswith("w") else 0
+    return timestamps - (timestamps - offset) % timeframe_ms(timeframe)
+
+
+def resample(candles: Mapping[str, np.ndarray], timeframe: str) -> OHLCV:
+    """
+    Aggregates candles into a higher timeframe, EX: 1m candles into 1h candles.
+
+    Candles are grouped by the period their timestamp falls in, aligned like exchange candles (see period_start):
+    to the epoch, and weeks to Monday. Each group's open is its first open, high the highest high, low the lowest
+    low, close the last close and volume the summed volume. The newest group may still be incomplete.
+
+    Parameters:
+    - candles (OHLCV): Base candles, oldest first. Column arrays keyed like data.ohlcv.COLUMNS work too.
+    - timeframe (str): The timeframe to aggregate into. EX: "5m", "1h", "4h", "1d".
+
+    Returns:
+    - OHLCV: The aggregated candles.
+    """
+
+    timeframe_ms(timeframe)  # validates the timeframe even without candles
+    candles = as_ohlcv(candles)
+    timestamps = candles.timestamp
+    if len(timestamps) == 0:
+        return OHLCV()
+
+    # each group starts where the period of the timestamp changes
+    periods = period_start(timestamps, timeframe)
+    starts = np.flatnonzero(np.concatenate(([True], periods[1:] != periods[:-1])))
+    ends = np.concatenate((starts[1:], [len(timestamps)])) - 1
+
+    return OHLCV({
+        "timestamp": periods[starts],
+        "open": candles.open[starts],
+        "high": np.maximum.reduceat(candles.high, starts),
+        "low": np.minimum.reduceat(candles.low, starts),
+        "close": candles.close[ends],
+        "volume": np.add.reduceat(candles.volume, starts),
+    })
+
+
+class Resampler:
+    """
+    Keeps higher timeframe candles up to date as base candles arrive.
+
+    Base candles are fed in batches with update, which returns the higher timeframe candles completed by them. The
+    candle still forming is kept in partial until a base candle of a later period arrives.
+    """
+
+    def __init__(self, timeframe: str):
+        """
+        Parameters:
+        - timeframe (str): The timeframe to aggregate into. EX: "1h".
+        """
+
+        self.timeframe = timeframe
+        self.partial: Optional[OHLCV] = None
+
+    def update(self, candles: Mapping[str, np.ndarray]) -> OHLCV:
+        """
+        Feeds new base candles, oldest first, that are all newer than the ones fed before.
+
+        Parameters:
+        - candles (OHLCV): New base candles.
+
+        Returns:
+        - OHLCV: Higher timeframe candles completed by this batch, possibly none.
+        """
+
+        candles = resample(candles, self.timeframe)
+        if len(candles) == 0:
+            return candles
+
+        if self.partial is not None:
+            if self.partial.timestamp[0] == candles.timestamp[0]:
+                # the batch continues the forming candle
+                candles.open[0] = self.partial.open[0]
+                candles.high[0] = max(candles.high[0], self.partial.high[0])
+                candles.low[0] = min(candles.low[0], self.partial.low[0])
+                candles.volume[0] += self.partial.volume[0]
+            else:
+                candles = OHLCV.concatenate([self.partial, candles])
+
+        self.partial = candles[-1:]
+        return candles[:-1]
+
+
+class ResamplingExchange:
+    """
+    Wraps an exchange so candles of any timeframe are built from a single base timeframe.
+
+    Only base candles are requested from the wrapped exchange, so a study using several timeframes downloads one
+    series per symbol. Wrap a data.candle_store.CachedExchange to serve the base candles from disk.
+    """
+
+    def __init__(self, exchange, base_timeframe: str = "1m"):
+        """
+        Parameters:
+        - exchange (ccxt.exchange): Exchange the base candles are fetched from.
+        - base_timeframe (str): Timeframe of the candles fetched from the exchange.
+        """
+
+        self.exchange = exchange
+        self.base_timeframe = base_timeframe
+
+    def __getattr__(self, name):
+        return getattr(self.exchange, name)
+
+    def fetch_arrays(self, symbol: str, timeframe: str = "1m", limit: Optional[int] = None) -> OHLCV:
+        """
+        Returns the most recent "limit" candles of any timeframe.
+
+        Parameters:
+        - symbol (str): Asset we want candles for. EX: "BTC/USD".
+        - timeframe (str): A multiple of the base timeframe. EX: "1h", "1d".
+        - limit (int): number of candles to return, everything the base candles cover if None.
+
+        Returns:
+        - OHLCV: The candles, oldest first. The newest may still be forming.
+        """
+
+        ratio, remainder = divmod(timeframe_ms(timeframe), timeframe_ms(self.base_timeframe))
+        if ratio == 0 or remainder:
+            raise ValueError(f"{timeframe} is not a multiple of the base timeframe {self.base_timeframe}")
+
+        # one extra period of base candles covers a first period that is only partly in range
+        base_limit = None if limit is None else (limit + 1) * ratio
+        base = fetch_candles(self.exchange, symbol, self.base_timeframe, base_limit)
+        candles = base if ratio == 1 else resample(base, timeframe)
+        return candles if limit is None else candles[-limit:]
+
+    def fetch_closes(self, symbol: str, timeframe: str = "1m", limit: Optional[int] = None) -> np.ndarray:
+        """
+        Returns the closing prices of the most recent "limit" candles of any timeframe.
+        """
+
+        return self.fetch_arrays(symbol, timeframe, limit)["close"]
+
+    def fetch_ohlcv(self, symbol: str, timeframe: str = "1m", since: Optional[int] = None,
+                    limit: Optional[int] = None, params: Optional[dict] = None) -> List[List]:
+        """
+        Drop-in replacement for ccxt's fetch_ohlcv that resamples the base candles.
+        """
+
+        candles = self.fetch_arrays(symbol, timeframe, None if since is not None else limit)
+        if since is not None:
+            start = int(np.searchsorted(candles.timestamp, since))
+            candles = candles[start:] if limit is None else candles[start:start + limit]
+
+        return candles.rows()
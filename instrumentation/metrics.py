@@ -0,0 +1,356 @@
+import bisect
+import functools
+import inspect
+import json
+import math
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+# upper bounds (seconds) of the latency histogram buckets, the last one catches everything slower
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+           30.0, 60.0, math.inf)
+
+# prefix of the metric names in the Prometheus export
+PREFIX = "dangerous_trades"
+
+# labels are kept as a sorted tuple of (name, value) pairs so they can key a dict
+Labels = Tuple[Tuple[str, str], ...]
+
+_enabled = False
+
+
+class Histogram:
+    """Latency histogram with fixed buckets, see BUCKETS."""
+
+    __slots__ = ("counts", "count", "sum", "min", "max")
+
+    def __init__(self):
+        self.counts: List[int] = [0] * len(BUCKETS)
+        self.count: int = 0
+        self.sum: float = 0.0
+        self.min: float = math.inf
+        self.max: float = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimates a quantile (0 <= q <= 1) by interpolating within its bucket, bounded by the observed min and max.
+        """
+
+        if self.count == 0:
+            return math.nan
+
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = max(BUCKETS[index - 1] if index else 0.0, self.min)
+                upper = min(BUCKETS[index], self.max)
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return self.max
+
+
+@dataclass
+class StageStats:
+    """Summary of the time spent in one stage, for one set of labels."""
+    stage: str  # EX: "fetch", "indicator", "simulation", "decision"
+    labels: Dict[str, str]  # EX: {"strategy": "moving_average_crossover", "symbol": "BTC/USD"}
+    count: int
+    total: float  # seconds
+    mean: float
+    min: float
+    max: float
+    p50: float
+    p90: float
+    p99: float
+
+
+class Metrics:
+    """
+    Stage timings and counters of a process, safe to update from several threads.
+
+    Use the module functions (stage, timed, count, ...), they record into the shared registry and cost a single
+    check while instrumentation is disabled.
+    """
+
+    def __init__(self):
+        self.histograms: Dict[Tuple[str, Labels], Histogram] = {}
+        self.counters: Dict[Tuple[str, Labels], float] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage: str, seconds: float, labels: Labels = ()) -> None:
+        with self._lock:
+            histogram = self.histograms.get((stage, labels))
+            if histogram is None:
+                histogram = self.histograms[(stage, labels)] = Histogram()
+            histogram.observe(seconds)
+
+    def count(self, name: str, value: float = 1, labels: Labels = ()) -> None:
+        with self._lock:
+            self.counters[(name, labels)] = self.counters.get((name, labels), 0) + value
+
+    def reset(self) -> None:
+        with self._lock:
+            self.histograms.clear()
+            self.counters.clear()
+
+    def stages(self) -> List[StageStats]:
+        """
+        Returns a summary of every stage and set of labels, slowest total first.
+        """
+
+        with self._lock:
+            items = [(stage, labels, histogram) for (stage, labels), histogram in self.histograms.items()]
+            stats = [StageStats(stage, dict(labels), histogram.count, histogram.sum, histogram.sum / histogram.count,
+                                histogram.min, histogram.max, histogram.quantile(0.5), histogram.quantile(0.9),
+                                histogram.quantile(0.99)) for stage, labels, histogram in items]
+        return sorted(stats, key=lambda stats: -stats.total)
+
+    def report(self) -> str:
+        """
+        Returns a human readable summary: time per stage, then the counters.
+        """
+
+        stages = [(stats.stage + "".join(f" {key}={value}" for key, value in stats.labels.items()), stats)
+                  for stats in self.stages()]
+        with self._lock:
+            counters = [(name + "".join(f" {key}={value}" for key, value in labels), value)
+                        for (name, labels), value in sorted(self.counters.items())]
+        width = max([len("stage")] + [len(name) for name, _ in stages + counters])
+
+        lines = [f"{'stage':<{width}} {'calls':>8} {'total s':>10} {'mean ms':>10} {'p50 ms':>10} {'p99 ms':>10} "
+                 f"{'max ms':>10}"]
+        for name, stats in stages:
+            lines.append(f"{name:<{width}} {stats.count:>8} {stats.total:>10.3f} {stats.mean * 1e3:>10.3f} "
+                         f"{stats.p50 * 1e3:>10.3f} {stats.p99 * 1e3:>10.3f} {stats.max * 1e3:>10.3f}")
+        for name, value in counters:
+            lines.append(f"{name:<{width}} {value!s:>8}")
+        return "\n".join(lines)
+
+    def to_json(self) -> str:
+        """
+        Returns the stage summaries and counters as JSON.
+        """
+
+        with self._lock:
+            counters = [{"name": name, "labels": dict(labels), "value": value}
+                        for (name, labels), value in sorted(self.counters.items())]
+        return json.dumps({"stages": [asdict(stats) for stats in self.stages()], "counters": counters}, indent=2)
+
+    def to_prometheus(self) -> str:
+        """
+        Returns the histograms and counters in the Prometheus text exposition format, EX: for node_exporter's
+        textfile collector. Stage timings are the histogram {PREFIX}_stage_seconds with a "stage" label, counters
+        get the _total suffix.
+        """
+
+        lines = [f"# TYPE {PREFIX}_stage_seconds histogram"]
+        with self._lock:
+            histograms = sorted(self.histograms.items(), key=lambda item: item[0])
+            counters = sorted(self.counters.items())
+
+            for (stage, labels), histogram in histograms:
+                base = (("stage", stage),) + labels
+                cumulative = 0
+                for bound, count in zip(BUCKETS, histogram.counts):
+                    cumulative += count
+                    le = "+Inf" if math.isinf(bound) else repr(bound)
+                    lines.append(f"{PREFIX}_stage_seconds_bucket{_format(base + (('le', le),))} {cumulative}")
+                lines.append(f"{PREFIX}_stage_seconds_sum{_format(base)} {histogram.sum!r}")
+                lines.append(f"{PREFIX}_stage_seconds_count{_format(base)} {histogram.count}")
+
+        for name in sorted({name for (name, _), _ in counters}):
+            lines.append(f"# TYPE {PREFIX}_{name}_total counter")
+            lines.extend(f"{PREFIX}_{name}_total{_format(labels)} {value!r}"
+                         for (counter, labels), value in counters if counter == name)
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str) -> None:
+        """
+        Writes the metrics to a file, as Prometheus text if the path ends in .prom and as JSON otherwise. The file
+        is replaced at once, so a scraper never reads a partial file.
+        """
+
+        text = self.to_prometheus() if path.endswith(".prom") else self.to_json()
+        with open(path + ".tmp", "w") as file:
+            file.write(text)
+        os.replace(path + ".tmp", path)
+
+
+def _format(labels: Labels) -> str:
+    if not labels:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in labels)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(labels, escaped)) + "}"
+
+
+def _labels(labels: Dict[str, object]) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+# registry the module functions record into
+registry = Metrics()
+
+
+class _Stage:
+    __slots__ = ("stage", "labels", "started")
+
+    def __init__(self, stage: str, labels: Labels):
+        self.stage = stage
+        self.labels = labels
+
+    def __enter__(self) -> "_Stage":
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exception) -> None:
+        registry.observe(self.stage, time.perf_counter() - self.started, self.labels)
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullStage":
+        return self
+
+    def __exit__(self, *exception) -> None:
+        pass
+
+
+_NULL_STAGE = _NullStage()
+
+
+def enable() -> None:
+    """Starts recording. Nothing is recorded until this is called."""
+    global _enabled
+    _enabled = True
+
+
+def disable() -> None:
+    """Stops recording, what was recorded so far is kept."""
+    global _enabled
+    _enabled = False
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def stage(name: str, **labels) -> "_Stage":
+    """
+    Times the enclosed block as a stage: with metrics.stage("decision", strategy=..., symbol=...): ...
+
+    Parameters:
+    - name (str): Name of the stage. EX: "fetch".
+    - labels: Label values the timings are kept apart by, EX: symbol="BTC/USD".
+    """
+
+    if not _enabled:
+        return _NULL_STAGE
+    return _Stage(name, _labels(labels))
+
+
+def timed(name: str, **labels) -> Callable[[Callable], Callable]:
+    """
+    Decorator timing every call of a function as a stage, labelled with the function's name. Coroutine functions
+    are timed until they return.
+    """
+
+    def decorator(function: Callable) -> Callable:
+        key = _labels({"function": function.__name__, **labels})
+
+        if inspect.iscoroutinefunction(function):
+            @functools.wraps(function)
+            async def timed_coroutine(*args, **kwargs):
+                if not _enabled:
+                    return await function(*args, **kwargs)
+                with _Stage(name, key):
+                    return await function(*args, **kwargs)
+            return timed_coroutine
+
+        @functools.wraps(function)
+        def timed_function(*args, **kwargs):
+            if not _enabled:
+                return function(*args, **kwargs)
+            with _Stage(name, key):
+                return function(*args, **kwargs)
+        return timed_function
+
+    return decorator
+
+
+def count(name: str, value: float = 1, **labels) -> None:
+    """
+    Adds to a counter. EX: metrics.count("network_calls", exchange="coinbase")
+    """
+
+    if _enabled:
+        registry.count(name, value, _labels(labels))
+
+
+def reset() -> None:
+    """Drops everything recorded so far."""
+    registry.reset()
+
+
+def report() -> str:
+    """See Metrics.report."""
+    return registry.report()
+
+
+def write(path: str) -> None:
+    """See Metrics.write."""
+    registry.write(path)
+
+
+class InstrumentedExchange:
+    """
+    Wraps a ccxt exchange so every fetch_ohlcv call, the actual network request, is timed as the "fetch" stage
+    and counted in network_calls and candles_fetched, labelled with the exchange id. Anything else is forwarded
+    to the wrapped exchange. Wrap the exchange innermost, EX: CachedExchange(InstrumentedExchange(exchange), ...),
+    so requests served from a cache are not counted.
+    """
+
+    def __init__(self, exchange):
+        self.exchange = exchange
+
+        # keep ccxt.async_support exchanges awaitable, callers check for a coroutine function
+        if inspect.iscoroutinefunction(exchange.fetch_ohlcv):
+            self.fetch_ohlcv = self._fetch_ohlcv_async
+
+    def __getattr__(self, name):
+        return getattr(self.exchange, name)
+
+    def fetch_ohlcv(self, symbol: str, timeframe: str = "1m", since: Optional[int] = None,
+                    limit: Optional[int] = None, params: Optional[dict] = None):
+        if not _enabled:
+            return self.exchange.fetch_ohlcv(symbol, timeframe, since=since, limit=limit, params=params or {})
+
+        labels = _labels({"exchange": getattr(self.exchange, "id", type(self.exchange).__name__)})
+        with _Stage("fetch", labels):
+            ohlcv = self.exchange.fetch_ohlcv(symbol, timeframe, since=since, limit=limit, params=params or {})
+        registry.count("network_calls", 1, labels)
+        registry.count("candles_fetched", len(ohlcv), labels)
+        return ohlcv
+
+    async def _fetch_ohlcv_async(self, symbol: str, timeframe: str = "1m", since: Optional[int] = None,
+                                 limit: Optional[int] = None, params: Optional[dict] = None):
+        if not _enabled:
+            return await self.exchange.fetch_ohlcv(symbol, timeframe, since=since, limit=limit, params=params or {})
+
+        labels = _labels({"exchange": getattr(self.exchange, "id", type(self.exchange).__name__)})
+        with _Stage("fetch", labels):
+            ohlcv = await self.exchange.fetch_ohlcv(symbol, timeframe, since=since, limit=limit, params=params or {})
+        registry.count("network_calls", 1, labels)
+        registry.count("candles_fetched", len(ohlcv), labels)
+        return ohlcv
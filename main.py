@@ -1,13 +1,12 @@
-import strategies.moving_averages as ma 
-import strategies.backtesting as bt
-
-from strategies.moving_averages import Position
-
-import matplotlib.pyplot as plt
-import ccxt
+# command line entry point: python main.py {signal,backtest,sweep,daemon} [--offline] [--metrics]
+# only the modules a command needs are imported, inside the command, so a signal check from cached candles does not
+# pay for ccxt's exchange catalog or matplotlib
+import argparse
+import sys
 
 # constants
-EXCHANGE = ccxt.coinbase()
+CANDLE_DIRECTORY = "candles"  # candles are cached here between runs
+EXCHANGE_ID = "coinbase"  # ccxt exchange, only constructed by commands that download candles
 SYMBOL = "BTC/USD"
 INVESTMENT = 100000
 SHORT_WINDOW = 3
@@ -15,21 +14,128 @@ LONG_WINDOW = 21
 TIMEFRAME = "1d"
 LIMIT = 90
 
-# are we holding the asset (IN) or not (OUT)
-BTC_POSITION = Position.OUT
-DOGE_POSITION = Position.OUT
-SHIB_POSITION = Position.OUT
-BONK_POSITION = Position.OUT
+WATCHLIST = ["BTC/USD", "DOGE/USD", "SHIB/USD", "BONK/USD"]
+POSITION_DATABASE = "positions.db"  # whether we are holding each asset (IN) or not (OUT), kept between runs
+DAEMON_INTERVAL = 86400  # seconds between evaluations in daemon mode, one per daily candle
+METRICS_FILES = ["metrics.json", "metrics.prom"]  # timings and counters of a run with --metrics
+
+SHORT_WINDOWS = range(2, 21)  # windows tried by the sweep
+LONG_WINDOWS = range(10, 101, 5)
+SWEEP_LIMIT = 365
+
+
+def exchange(offline: bool, symbols):
+    """
+    Constructs the exchange on demand: candles cached in CANDLE_DIRECTORY, topped up from EXCHANGE_ID unless
+    offline, in which case the cached candles are served as they are and ccxt is never imported.
+    """
+
+    from data.candle_store import CandleStore
+    store = CandleStore(CANDLE_DIRECTORY)
+
+    if offline:
+        from data.replay import ReplayExchange
+        cached = ReplayExchange.from_store(store, EXCHANGE_ID, symbols, TIMEFRAME)
+        cached.seek(int(cached.timestamps[-1]))
+        return cached
+
+    import ccxt
+    from data.candle_store import CachedExchange
+    from instrumentation.metrics import InstrumentedExchange
+    return CachedExchange(InstrumentedExchange(getattr(ccxt, EXCHANGE_ID)()), store)
+
+
+def signal(arguments) -> None:
+    # buy, sell, wait reccomendation
+    import strategies.moving_averages as ma
+    from instrumentation import metrics
+    from strategies.moving_averages import Position
+    from strategies.positions import PositionStore
+
+    market = exchange(arguments.offline, WATCHLIST)
+    positions = PositionStore(POSITION_DATABASE).positions(f"moving_average_crossover{(SHORT_WINDOW, LONG_WINDOW)}")
+    for symbol in WATCHLIST:
+        position = positions.get(symbol, Position.OUT)
+        with metrics.stage("decision", strategy="moving_average_crossover", symbol=symbol):
+            action = ma.moving_average_crossover(market, symbol, SHORT_WINDOW, LONG_WINDOW, position)
+        print(f"{symbol}: {action}")
+
+
+def backtest(arguments) -> None:
+    import strategies.backtesting as bt
+    from instrumentation import metrics
+
+    with metrics.stage("backtest", strategy="moving_average_crossover", symbol=SYMBOL):
+        result = bt.moving_average_crossover(exchange(arguments.offline, [SYMBOL]), SYMBOL, INVESTMENT,
+                                             SHORT_WINDOW, LONG_WINDOW, TIMEFRAME, LIMIT)
+    print(f"Results: {INVESTMENT} -> {round(result.final_value, 2)}")
+
+    if arguments.plot:
+        import strategies.plotting as plotting
+        plotting.plot(result)
+
+
+def sweep(arguments) -> None:
+    # every (short, long) window pair on the same candles, best final value first
+    import strategies.sweep as sweeps
+    from data.candle_store import fetch_closes
+
+    prices = fetch_closes(exchange(arguments.offline, [SYMBOL]), SYMBOL, TIMEFRAME, SWEEP_LIMIT)
+    result = sweeps.moving_average_crossover(prices, INVESTMENT, SHORT_WINDOWS, LONG_WINDOWS)
+    for row in sorted(result.rows(), key=lambda row: -row["final_value"])[:arguments.top]:
+        print(f"short {row['short_window']:>3} long {row['long_window']:>3}: {INVESTMENT} -> "
+              f"{round(row['final_value'], 2)}, {row['trades']} trades, drawdown {row['max_drawdown']:.1%}")
+
+
+def daemon(arguments) -> None:
+    # evaluates the watchlist on a schedule and prints only BUY/SELL transitions, positions follow the recommendations
+    import asyncio
+    import strategies.daemon as daemons
+    import strategies.moving_averages as ma
+    from instrumentation import metrics
+    from strategies.positions import PositionStore
+
+    asyncio.run(daemons.run(exchange(arguments.offline, WATCHLIST), WATCHLIST, ma.moving_average_crossover,
+                            SHORT_WINDOW, LONG_WINDOW, store=PositionStore(POSITION_DATABASE),
+                            interval=DAEMON_INTERVAL, metrics_path=METRICS_FILES[-1] if metrics.enabled() else None))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Moving average strategies: recommendations, backtests and sweeps.")
+    parser.add_argument("--offline", action="store_true",
+                        help=f"use only the candles cached in {CANDLE_DIRECTORY}/, no network")
+    parser.add_argument("--metrics", action="store_true",
+                        help=f"time every stage and count network calls, written to {' and '.join(METRICS_FILES)}")
+    commands = parser.add_subparsers(dest="command")
+
+    commands.add_parser("signal", help="buy, sell or wait for every symbol of the watchlist").set_defaults(run=signal)
+    command = commands.add_parser("backtest", help=f"backtest the strategy on {SYMBOL}")
+    command.add_argument("--plot", action="store_true", help="plot prices, averages and trades")
+    command.set_defaults(run=backtest)
+    command = commands.add_parser("sweep", help=f"backtest every window pair on {SYMBOL}")
+    command.add_argument("--top", type=int, default=10, help="number of window pairs to print")
+    command.set_defaults(run=sweep)
+    commands.add_parser("daemon", help="evaluate the watchlist on a schedule").set_defaults(run=daemon)
+    arguments = parser.parse_args(argv)
 
+    if arguments.metrics:
+        from instrumentation import metrics
+        metrics.enable()
 
-# backtesting
-total_return =bt.moving_average_crossover(EXCHANGE, SYMBOL, INVESTMENT, SHORT_WINDOW, LONG_WINDOW, TIMEFRAME, LIMIT)
-print(f"Results: {INVESTMENT} -> {round(total_return, 2)}")
+    if arguments.command is None:
+        # no command: backtest with a plot, then the recommendations
+        arguments.plot = True
+        backtest(arguments)
+        signal(arguments)
+    else:
+        arguments.run(arguments)
 
+    if arguments.metrics:
+        print(metrics.report())
+        for path in METRICS_FILES:
+            metrics.write(path)
+    return 0
 
-# buy, sell, wait reccomendation
-print(f"BTC:  {ma.moving_average_crossover(EXCHANGE, "BTC/USD", SHORT_WINDOW, LONG_WINDOW, BTC_POSITION)}")
-print(f"DOGE: {ma.moving_average_crossover(EXCHANGE, "DOGE/USD", SHORT_WINDOW, LONG_WINDOW, DOGE_POSITION)}")
-print(f"SHIB: {ma.moving_average_crossover(EXCHANGE, "SHIB/USD", SHORT_WINDOW, LONG_WINDOW, SHIB_POSITION)}")
-print(f"BONK: {ma.moving_average_crossover(EXCHANGE, "BONK/USD", SHORT_WINDOW, LONG_WINDOW, BONK_POSITION)}")
 
+if __name__ == "__main__":
+    sys.exit(main())
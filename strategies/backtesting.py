@@ -1,12 +1,217 @@
-from typing import Callable, List
-from strategies.moving_averages import Position
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+from algorithms import smoothing
+from algorithms.cache import default_cache
+from data.candle_store import exchange_id, fetch_closes
+from instrumentation import metrics
 
-import algorithms.smoothing as smoothing
-import matplotlib.pyplot as plt
+import numpy as np
+
+# default cost of a trade: proportional fee charged on every fill, and slippage applied to every fill price
+FEE = 0.001
+SLIPPAGE = 0.0
+
+
+@dataclass
+class BacktestResult:
+    """
+    Outcome of a single simulation. Nothing is plotted while backtesting, see strategies.plotting.
+    """
+    final_value: float  # value after the simulation, an open position is liquidated at the last price
+    prices: np.ndarray  # closing prices the simulation traded on
+    equity: np.ndarray  # value at the close of every bar
+    returns: np.ndarray  # bar to bar returns of the equity curve, the first relative to the investment
+    buys: np.ndarray  # bars where the asset was bought
+    sells: np.ndarray  # bars where the asset was sold, including a final liquidation
+    indicators: Dict[str, np.ndarray] = field(default_factory=dict)  # EX: {"short_average": ...}
+
+    @property
+    def trades(self) -> np.ndarray:
+        """(buy bar, sell bar) of every round trip."""
+        return np.column_stack((self.buys, self.sells))
+
+
+def simulate(prices: np.ndarray, positions: np.ndarray, investment: float, fee: float = FEE,
+             slippage: float = SLIPPAGE, indicators: Optional[Dict[str, np.ndarray]] = None) -> BacktestResult:
+    """
+    Simulates trading an asset according to a precomputed position for every bar.
+
+    This is the core every backtest in this module plugs into: a strategy only decides when it wants to hold the
+    asset, trades, equity curve and returns are derived here without a Python-level loop over the bars.
+
+    Parameters:
+    - prices (np.ndarray): Closing prices, trades are filled at the close.
+    - positions (np.ndarray): True for the bars where the asset should be held (Position.IN).
+    - investment (float): The amount of to start the simulation with.
+    - fee (float): Fraction of the traded value paid as fees on every buy and sell.
+    - slippage (float): Fraction by which fills are worse than the close, buys pay more and sells receive less.
+    - indicators (Dict[str, np.ndarray]): Curves the strategy derived its positions from, kept for inspection.
+
+    Returns:
+    - BacktestResult: Trades, equity curve and returns of the simulation.
+    """
+
+    prices = np.asarray(prices, dtype=np.float64)
+    positions = np.asarray(positions, dtype=bool)
+
+    equity = equity_curve(prices, positions, investment, fee, slippage)
+    returns = np.empty_like(equity)
+    returns[0] = equity[0] / investment - 1
+    returns[1:] = equity[1:] / equity[:-1] - 1
+
+    changes = np.flatnonzero(positions[1:] != positions[:-1]) + 1
+    if positions[0]:
+        changes = np.concatenate(([0], changes))
+    if positions[-1]:
+        changes = np.concatenate((changes, [len(positions) - 1]))
+
+    return BacktestResult(final_value=float(equity[-1]), prices=prices, equity=equity, returns=returns,
+                          buys=changes[0::2], sells=changes[1::2], indicators=indicators or {})
+
+
+@metrics.timed("simulation")
+def equity_curve(prices: np.ndarray, positions: np.ndarray, investment: float, fee: float = FEE,
+                 slippage: float = SLIPPAGE) -> np.ndarray:
+    """
+    Computes the value of a simulation at the close of every bar, see simulate.
+
+    Works along the last axis, so many simulations can be run at once: positions of shape (simulations, bars)
+    with prices of shape (bars,) or (simulations, bars).
+
+    Returns:
+    - np.ndarray: The equity curves, the last value includes liquidating an open position.
+    """
+
+    metrics.count("bars_simulated", positions.size)
+
+    held_before = np.zeros_like(positions)
+    held_before[..., 1:] = positions[..., :-1]
+
+    # while the asset is held the value follows the price
+    growth = np.ones(np.broadcast_shapes(np.shape(prices), positions.shape))
+    growth[..., 1:] = np.where(held_before[..., 1:], prices[..., 1:] / prices[..., :-1], 1.0)
+
+    # each buy and sell costs the fee and the slippage, an open position is sold at the last price
+    sells = held_before & ~positions
+    sells[..., -1] |= positions[..., -1]
+    growth *= 1 + (positions & ~held_before) * ((1 - fee) / (1 + slippage) - 1)
+    growth *= 1 + sells * ((1 - fee) * (1 - slippage) - 1)
+
+    return investment * np.cumprod(growth, axis=-1)
+
+
+def trend_positions(averages: np.ndarray) -> np.ndarray:
+    """
+    Positions of the trend following strategies: IN once the average rises, OUT once it falls, unchanged while
+    it is flat. The simulation starts out of the market. Works along the last axis.
+    """
+
+    direction = np.zeros(averages.shape, dtype=np.int8)
+    direction[..., 1:] = np.sign(np.diff(averages, axis=-1))
+    return _carry(direction) > 0
+
+
+def breakout_positions(prices: np.ndarray, upper: np.ndarray, lower: np.ndarray) -> np.ndarray:
+    """
+    Positions of the channel breakout strategies: IN once the price closes above the previous bar's upper band,
+    OUT once it closes below the previous bar's lower band, unchanged in between. The simulation starts out of the
+    market. Works along the last axis.
+    """
+
+    direction = np.zeros(np.broadcast_shapes(np.shape(prices), np.shape(upper)), dtype=np.int8)
+    direction[..., 1:] = np.where(prices[..., 1:] > upper[..., :-1], 1, 0)
+    direction[..., 1:] -= prices[..., 1:] < lower[..., :-1]
+    return _carry(direction) > 0
+
+
+def _carry(direction: np.ndarray) -> np.ndarray:
+    # carry the last non-zero direction forward
+    bars = np.where(direction != 0, np.arange(direction.shape[-1]), 0)
+    np.maximum.accumulate(bars, axis=-1, out=bars)
+    return np.take_along_axis(direction, bars, axis=-1)
+
+
+def crossover_positions(short_averages: np.ndarray, long_averages: np.ndarray) -> np.ndarray:
+    """
+    Positions of the crossover strategies: IN while the short average is above the long average. The
+    simulation starts out of the market and acts from the second bar. Works along the last axis.
+    """
+
+    positions = long_averages < short_averages
+    positions[..., 0] = False
+    return positions
+
+
+def simple_moving_average_signal(prices: np.ndarray, window: int) -> np.ndarray:
+    """Positions of the simple moving average strategy, see simple_moving_average."""
+    return trend_positions(smoothing.simple_moving_average_array(prices, window))
+
+
+def exponential_moving_average_signal(prices: np.ndarray, alpha: float) -> np.ndarray:
+    """Positions of the exponential moving average strategy, see exponential_moving_average."""
+    return trend_positions(smoothing.exponential_moving_average_array(prices, alpha))
+
+
+def moving_average_crossover_signal(prices: np.ndarray, short_window: int, long_window: int) -> np.ndarray:
+    """Positions of the moving average crossover strategy, see moving_average_crossover."""
+    return crossover_positions(smoothing.simple_moving_average_array(prices, short_window),
+                               smoothing.simple_moving_average_array(prices, long_window))
+
+
+def exponential_moving_average_crossover_signal(prices: np.ndarray, small_alpha: float,
+                                                big_alpha: float) -> np.ndarray:
+    """Positions of the exponential moving average crossover strategy, see exponential_moving_average_crossover."""
+    return crossover_positions(smoothing.exponential_moving_average_array(prices, big_alpha),
+                               smoothing.exponential_moving_average_array(prices, small_alpha))
+
+
+def weighted_moving_average_signal(prices: np.ndarray, window: int) -> np.ndarray:
+    """Positions of the weighted moving average strategy, see weighted_moving_average."""
+    return trend_positions(smoothing.weighted_moving_average_array(prices, window))
+
+
+def breakout_signal(prices: np.ndarray, window: int) -> np.ndarray:
+    """Positions of the channel breakout strategy, see breakout."""
+    prices = np.asarray(prices, dtype=np.float64)
+    return breakout_positions(prices, *_channel(prices, window))
+
+
+def _channel(prices: np.ndarray, window: int) -> Tuple[np.ndarray, np.ndarray]:
+    # highest and lowest close of every complete window, NaN before the first one so that, like the live strategy,
+    # nothing is traded before "window" previous closes exist
+    upper = np.full(prices.shape, np.nan)
+    lower = np.full(prices.shape, np.nan)
+    upper[..., window-1:] = smoothing.rolling_max_array(prices, window, approximate_start=False)
+    lower[..., window-1:] = smoothing.rolling_min_array(prices, window, approximate_start=False)
+    return upper, lower
+
+
+def hold(exchange, symbol: str, investment: float, timeframe: str="1d", limit: int=365, fee: float=FEE,
+         slippage: float=SLIPPAGE) -> BacktestResult:
+    """
+    The most simple strategy and a good benchmark. Compute total return if you were to hold
+    an asset for a given duration.
+
+    Parameters:
+    - exchange (ccxt.exchange): Exchange we wish to trade on.
+    - symbol (str): Asset that we want to backtest. EX: "BTC/USD".
+    - investment (float): The amount of to start the simulation with.
+    - timeframe (str): minutes (1m), days (1d), etc..
+    - limit (int): number of datapoints in backtest, downloaded in pages beyond the exchange limit (300, 1000)
+    - fee (float): Fraction of the traded value paid as fees on every buy and sell.
+    - slippage (float): Fraction by which fills are worse than the close.
+
+    Returns:
+    - BacktestResult: Trades and equity curve of the simulation, final_value is the investment value after it.
+    """
+
+    historical_data = np.asarray(fetch_closes(exchange, symbol, timeframe, limit), dtype=np.float64)
+    return simulate(historical_data, np.ones(len(historical_data), dtype=bool), investment, fee, slippage)
 
 
 def simple_moving_average(exchange, symbol: str, investment: float, window:int,
-                                   timeframe: str="1m", limit: int=365) -> float:
+                                   timeframe: str="1m", limit: int=365, fee: float=FEE,
+                                   slippage: float=SLIPPAGE) -> BacktestResult:
     """
     Backtest the simple moving average (SMA) strategy on historical data.
 
@@ -16,65 +221,27 @@ def simple_moving_average(exchange, symbol: str, investment: float, window:int,
     - investment (float): The amount of to start the simulation with.
     - window (int): Number of consecutive data points to compute average over.
     - timeframe (str): minutes (1m), days (1d), etc..
-    - limit (int): number of datapoints in backtest. Some exchanges impose limits (300, 1000)
+    - limit (int): number of datapoints in backtest, downloaded in pages beyond the exchange limit (300, 1000)
+    - fee (float): Fraction of the traded value paid as fees on every buy and sell.
+    - slippage (float): Fraction by which fills are worse than the close.
 
     Returns:
-    - float: Investment value after the simulation.
+    - BacktestResult: Trades, equity curve and indicators of the simulation, final_value is the investment value
+      after it.
     """
-    
-    # define variables
-    position: Position = Position.OUT
-    buy_price: float = 0
-    sell_price: float = 0
-    buys: List[List[int], List[float]] = [[], []]
-    sells: List[List[int], List[float]] = [[], []]
 
     # get historical pricing data and compute smooth curve using SMA
-    ohlcv: List[List] = exchange.fetch_ohlcv(symbol, timeframe, limit)
-    historical_data: List[float] = [ohlcv[i][4] for i in range(len(ohlcv))]
-    smoothed_data: List[float] = simple_moving_average(historical_data, window)
-    
+    historical_data = np.asarray(fetch_closes(exchange, symbol, timeframe, limit), dtype=np.float64)
+    smoothed_data = default_cache.simple_moving_average(historical_data, window,
+                                                        series=(exchange_id(exchange), symbol, timeframe))
+
     # test trading strategy
-    for i in range(1, len(smoothed_data)):
-        if(smoothed_data[i-1] < smoothed_data[i]) and position == Position.OUT:
-            # we want to buy 
-            buy_price = historical_data[i]
-            position = Position.IN
-            investment *= 0.999  # simulate fees
-
-            # log buy
-            buys[0].append(i)
-            buys[1].append(buy_price)
-        
-        if(smoothed_data[i-1] > smoothed_data[i]) and position == Position.IN:
-            # we want to sell
-            sell_price = historical_data[i]
-            position = Position.OUT
-            investment = investment * (sell_price / buy_price)
-            investment *= 0.999  # simulate fees
-
-            # log sell 
-            sells[0].append(i)
-            sells[1].append(sell_price)
-    
-    # plot lines
-    plt.plot(historical_data, color="black")
-    plt.plot(smoothed_data, color="red")
-
-    #plot buy and sell points 
-    plt.scatter(buys[0], buys[1], color="green")
-    plt.scatter(sells[0], sells[1], color="red")
-
-    plt.show()
-
-    if position==Position.IN:
-        investment = (investment * (historical_data[-1] / buy_price)) * .999
-
-    return investment
+    return simulate(historical_data, trend_positions(smoothed_data), investment, fee, slippage,
+                    {"average": smoothed_data})
 
 
 def exponential_moving_average(exchange, symbol: str, investment: float, alpha: float, timeframe: str="1m",
-                          limit: int=365) -> float:
+                          limit: int=365, fee: float=FEE, slippage: float=SLIPPAGE) -> BacktestResult:
     """
     Backtest the exponential moving average (SMA) strategy on historical data.
 
@@ -84,65 +251,28 @@ def exponential_moving_average(exchange, symbol: str, investment: float, alpha:
     - investment (float): The amount of to start the simulation with.
     - alpha (float): EMA parameter alpha 0 <= alpha <= 1, bigger number gives more weight to recent data.
     - timeframe (str): minutes (1m), days (1d), etc..
-    - limit (int): number of datapoints in backtest. Some exchanges impose limits (300, 1000)
+    - limit (int): number of datapoints in backtest, downloaded in pages beyond the exchange limit (300, 1000)
+    - fee (float): Fraction of the traded value paid as fees on every buy and sell.
+    - slippage (float): Fraction by which fills are worse than the close.
 
     Returns:
-    - float: Investment value after the simulation.
+    - BacktestResult: Trades, equity curve and indicators of the simulation, final_value is the investment value
+      after it.
     """
-    
-    # define variables
-    position: Position = Position.OUT
-    buy_price: float = 0
-    sell_price: float = 0
-    buys: List[List[int], List[float]] = [[], []]
-    sells: List[List[int], List[float]] = [[], []]
 
-    # get historical pricing data and compute smooth curve using SMA
-    ohlcv: List[List] = exchange.fetch_ohlcv(symbol, timeframe, limit)
-    historical_data: List[float] = [ohlcv[i][4] for i in range(len(ohlcv))]
-    smoothed_data: List[float] = smoothing.exponential_moving_average(historical_data, alpha)
-    
+    # get historical pricing data and compute smooth curve using EMA
+    historical_data = np.asarray(fetch_closes(exchange, symbol, timeframe, limit), dtype=np.float64)
+    smoothed_data = default_cache.exponential_moving_average(historical_data, alpha,
+                                                             series=(exchange_id(exchange), symbol, timeframe))
+
     # test trading strategy
-    for i in range(1, len(smoothed_data)):
-        if(smoothed_data[i-1] < smoothed_data[i]) and position == Position.OUT:
-            # we want to buy 
-            buy_price = historical_data[i]
-            position = Position.IN
-            investment *= 0.999  # simulate fees
-
-            # log buy
-            buys[0].append(i)
-            buys[1].append(buy_price)
-        
-        if(smoothed_data[i-1] > smoothed_data[i]) and position == Position.IN:
-            # we want to sell
-            sell_price = historical_data[i]
-            position = Position.OUT
-            investment = investment * (sell_price / buy_price)
-            investment *= 0.999  # simulate fees
-
-            # log sell 
-            sells[0].append(i)
-            sells[1].append(sell_price)
-    
-    # plot lines
-    plt.plot(historical_data, color="black")
-    plt.plot(smoothed_data, color="red")
-
-    #plot buy and sell points 
-    plt.scatter(buys[0], buys[1], color="green")
-    plt.scatter(sells[0], sells[1], color="red")
-
-    plt.show()
-
-    if position==Position.IN:
-        investment = (investment * (historical_data[-1] / buy_price)) * .999
-
-    return investment
- 
+    return simulate(historical_data, trend_positions(smoothed_data), investment, fee, slippage,
+                    {"average": smoothed_data})
+
 
 def moving_average_crossover(exchange, symbol: str, investment: float, short_window:int, long_window:int,
-                             timeframe: str="1d", limit: int=365) -> float:
+                             timeframe: str="1d", limit: int=365, fee: float=FEE,
+                             slippage: float=SLIPPAGE) -> BacktestResult:
     """
     Backtest the simple moving average (SMA) strategy on historical data.
 
@@ -153,71 +283,31 @@ def moving_average_crossover(exchange, symbol: str, investment: float, short_win
     - short_window (int): Number of consecutive data points to compute average over.
     - long_window (int): Number of consecutive data points to compute average over.
     - timeframe (str): minutes (1m), days (1d), etc..
-    - limit (int): number of datapoints in backtest. Some exchanges impose limits (300, 1000)
+    - limit (int): number of datapoints in backtest, downloaded in pages beyond the exchange limit (300, 1000)
+    - fee (float): Fraction of the traded value paid as fees on every buy and sell.
+    - slippage (float): Fraction by which fills are worse than the close.
 
     Returns:
-    - float: Investment value after the simulation.
+    - BacktestResult: Trades, equity curve and indicators of the simulation, final_value is the investment value
+      after it.
     """
-    
-    # define variables
-    position: Position = Position.OUT
-    recommended_position = Position.OUT
-    buy_price: float = 0
-    sell_price: float = 0
-    buys: List[List[int], List[float]] = [[], []]
-    sells: List[List[int], List[float]] = [[], []]
 
-    # get historical pricing data and compute smooth curve using SMA
-    ohlcv: List[List] = exchange.fetch_ohlcv(symbol, timeframe, limit)
-    historical_data: List[float] = [ohlcv[i][4] for i in range(len(ohlcv))]
-    short_average_data: List[float] = smoothing.simple_moving_average(historical_data, short_window)
-    long_average_data: List[float] = smoothing.simple_moving_average(historical_data, long_window)
+    # get historical pricing data and compute smooth curves using SMA
+    historical_data = np.asarray(fetch_closes(exchange, symbol, timeframe, limit), dtype=np.float64)
+    series = (exchange_id(exchange), symbol, timeframe)
+    short_average_data = default_cache.simple_moving_average(historical_data, short_window, series=series)
+    long_average_data = default_cache.simple_moving_average(historical_data, long_window, series=series)
 
-    
     # test trading strategy
-    for i in range(1, len(historical_data)):
-
-        recommended_position = Position.IN if long_average_data[i] < short_average_data[i] else Position.OUT
-
-        if position == Position.OUT and recommended_position == Position.IN:
-            # we want to buy 
-            buy_price = historical_data[i]
-            position = Position.IN
-            investment *= 0.999  # simulate fees
-            buys[0].append(i)
-            buys[1].append(buy_price)
-        
-        if position == Position.IN and recommended_position == Position.OUT:
-            # we want to sell
-            sell_price = historical_data[i]
-            position = Position.OUT
-            investment = investment * (sell_price / buy_price)
-            investment *= 0.999  # simulate fees
-            sells[0].append(i)
-            sells[1].append(sell_price)
-    
-    
-    # plot lines
-    plt.plot(historical_data, color="black")
-    plt.plot(short_average_data, color="red")
-    plt.plot(long_average_data, color="blue")
-
-    #plot buy and sell points 
-    plt.scatter(buys[0], buys[1], color="green")
-    plt.scatter(sells[0], sells[1], color="red")
-
-    plt.show()
-
-    if position==Position.IN:
-        investment = (investment * (historical_data[-1] / buy_price)) * .999
-
-    return investment  
+    return simulate(historical_data, crossover_positions(short_average_data, long_average_data), investment,
+                    fee, slippage, {"short_average": short_average_data, "long_average": long_average_data})
 
 
 def exponential_moving_average_crossover(exchange, symbol: str, investment: float, small_alpha: float, big_alpha: float,
-                             timeframe: str="1d", limit: int=365) -> float:
+                             timeframe: str="1d", limit: int=365, fee: float=FEE,
+                             slippage: float=SLIPPAGE) -> BacktestResult:
     """
-    Backtest the exponential moving crossover strategy on historical data. This is more of a play thing than a true 
+    Backtest the exponential moving crossover strategy on historical data. This is more of a play thing than a true
     strategy. But perhaps you find application for it.
 
     Parameters:
@@ -227,64 +317,83 @@ def exponential_moving_average_crossover(exchange, symbol: str, investment: floa
     - small_alpha (float): EMA parameter alpha 0 <= alpha <= 1, bigger number gives more weight to recent data.
     - big_alpha (float): EMA parameter alpha 0 <= alpha <= 1, bigger number gives more weight to recent data.
     - timeframe (str): minutes (1m), days (1d), etc..
-    - limit (int): number of datapoints in backtest. Some exchanges impose limits (300, 1000)
+    - limit (int): number of datapoints in backtest, downloaded in pages beyond the exchange limit (300, 1000)
+    - fee (float): Fraction of the traded value paid as fees on every buy and sell.
+    - slippage (float): Fraction by which fills are worse than the close.
 
     Returns:
-    - float: Investment value after the simulation.
+    - BacktestResult: Trades, equity curve and indicators of the simulation, final_value is the investment value
+      after it.
     """
-    
-    # define variables
-    position: Position = Position.OUT
-    recommended_position = Position.OUT
-    buy_price: float = 0
-    sell_price: float = 0
-    buys: List[List[int], List[float]] = [[], []]
-    sells: List[List[int], List[float]] = [[], []]
 
-    # get historical pricing data and compute smooth curve using SMA
-    ohlcv: List[List] = exchange.fetch_ohlcv(symbol, timeframe, limit)
-    historical_data: List[float] = [ohlcv[i][4] for i in range(len(ohlcv))]
-    short_average_data: List[float] = smoothing.exponential_moving_average(historical_data, big_alpha)
-    long_average_data: List[float] = smoothing.exponential_moving_average(historical_data, small_alpha)
+    # get historical pricing data and compute smooth curves using EMA
+    historical_data = np.asarray(fetch_closes(exchange, symbol, timeframe, limit), dtype=np.float64)
+    series = (exchange_id(exchange), symbol, timeframe)
+    short_average_data = default_cache.exponential_moving_average(historical_data, big_alpha, series=series)
+    long_average_data = default_cache.exponential_moving_average(historical_data, small_alpha, series=series)
+
+    # test trading strategy
+    return simulate(historical_data, crossover_positions(short_average_data, long_average_data), investment,
+                    fee, slippage, {"short_average": short_average_data, "long_average": long_average_data})
+
+
+
+def weighted_moving_average(exchange, symbol: str, investment: float, window: int, timeframe: str="1m",
+                            limit: int=365, fee: float=FEE, slippage: float=SLIPPAGE) -> BacktestResult:
+    """
+    Backtest the weighted moving average (WMA) strategy on historical data: like simple_moving_average, with the
+    recent data points of the window weighted more.
+
+    Parameters:
+    - exchange (ccxt.exchange): Exchange we wish to trade on.
+    - symbol (str): Asset that we want to backtest. EX: "BTC/USD".
+    - investment (float): The amount of to start the simulation with.
+    - window (int): Number of consecutive data points to compute average over.
+    - timeframe (str): minutes (1m), days (1d), etc..
+    - limit (int): number of datapoints in backtest, downloaded in pages beyond the exchange limit (300, 1000)
+    - fee (float): Fraction of the traded value paid as fees on every buy and sell.
+    - slippage (float): Fraction by which fills are worse than the close.
+
+    Returns:
+    - BacktestResult: Trades, equity curve and indicators of the simulation, final_value is the investment value
+      after it.
+    """
+
+    # get historical pricing data and compute smooth curve using WMA
+    historical_data = np.asarray(fetch_closes(exchange, symbol, timeframe, limit), dtype=np.float64)
+    smoothed_data = smoothing.weighted_moving_average_array(historical_data, window)
+
+    # test trading strategy
+    return simulate(historical_data, trend_positions(smoothed_data), investment, fee, slippage,
+                    {"average": smoothed_data})
+
+
+def breakout(exchange, symbol: str, investment: float, window: int, timeframe: str="1d", limit: int=365,
+             fee: float=FEE, slippage: float=SLIPPAGE) -> BacktestResult:
+    """
+    Backtest the channel breakout strategy on historical data: buy when the price closes above the highest close
+    of the previous "window" bars, sell when it closes below the lowest. Nothing is traded before "window" previous
+    closes exist, like the live strategy.
+
+    Parameters:
+    - exchange (ccxt.exchange): Exchange we wish to trade on.
+    - symbol (str): Asset that we want to backtest. EX: "BTC/USD".
+    - investment (float): The amount of to start the simulation with.
+    - window (int): Number of consecutive data points the channel spans.
+    - timeframe (str): minutes (1m), days (1d), etc..
+    - limit (int): number of datapoints in backtest, downloaded in pages beyond the exchange limit (300, 1000)
+    - fee (float): Fraction of the traded value paid as fees on every buy and sell.
+    - slippage (float): Fraction by which fills are worse than the close.
+
+    Returns:
+    - BacktestResult: Trades, equity curve and indicators of the simulation, final_value is the investment value
+      after it.
+    """
+
+    # get historical pricing data and compute the channel
+    historical_data = np.asarray(fetch_closes(exchange, symbol, timeframe, limit), dtype=np.float64)
+    upper, lower = _channel(historical_data, window)
 
-    
     # test trading strategy
-    for i in range(1, len(historical_data)):
-
-        recommended_position = Position.IN if long_average_data[i] < short_average_data[i] else Position.OUT
-
-        if position == Position.OUT and recommended_position == Position.IN:
-            # we want to buy 
-            buy_price = historical_data[i]
-            position = Position.IN
-            investment *= 0.999  # simulate fees
-            buys[0].append(i)
-            buys[1].append(buy_price)
-        
-        if position == Position.IN and recommended_position == Position.OUT:
-            # we want to sell
-            sell_price = historical_data[i]
-            position = Position.OUT
-            investment = investment * (sell_price / buy_price)
-            investment *= 0.999  # simulate fees
-            sells[0].append(i)
-            sells[1].append(sell_price)
-    
-    
-    # plot lines
-    plt.plot(historical_data, color="black")
-    plt.plot(short_average_data, color="red")
-    plt.plot(long_average_data, color="blue")
-
-    #plot buy and sell points 
-    plt.scatter(buys[0], buys[1], color="green")
-    plt.scatter(sells[0], sells[1], color="red")
-
-    plt.show()
-
-    if position==Position.IN:
-        investment = (investment * (historical_data[-1] / buy_price)) * .999
-
-    return investment
-
- 
+    return simulate(historical_data, breakout_positions(historical_data, upper, lower), investment, fee, slippage,
+                    {"upper": upper, "lower": lower})
@@ -0,0 +1,71 @@
+import time
+from typing import Callable, Dict, List, Optional
+from instrumentation import metrics
+from strategies.moving_averages import Action, generate_signals
+from strategies.positions import PositionStore
+
+import asyncio
+
+
+async def run(exchange, watchlist: List[str], strategy: Callable[..., Action], *args, store: PositionStore,
+              interval: float = 3600.0, name: Optional[str] = None,
+              on_transition: Optional[Callable[[str, Action], None]] = None, iterations: Optional[int] = None,
+              concurrency: int = 16, rate_limit: Optional[float] = None, metrics_path: Optional[str] = None) -> None:
+    """
+    Evaluates a strategy for a whole watchlist on a schedule, reporting only BUY/SELL transitions.
+
+    Positions are read from and written back to the store, so restarting the daemon resumes where it stopped. The
+    exchange is kept for the lifetime of the daemon: wrap it in a data.candle_store.CachedExchange so history is
+    loaded once and every tick only downloads the candles that closed since the previous one.
+
+    Parameters:
+    - exchange (ccxt.exchange): The exchange we wish to trade on.
+    - watchlist (List[str]): The symbols/tickers to evaluate. EX: ["BTC/USD", "DOGE/USD"]
+    - strategy (Callable): One of the strategies in strategies.moving_averages, EX: moving_average_crossover.
+    - args: The strategy's parameters between symbol and position, EX: short_window, long_window.
+    - store (PositionStore): Where positions are kept between ticks and restarts.
+    - interval (float): Seconds between ticks, ticks are aligned to multiples of it (3600 runs on the hour).
+    - name (str): Name the positions are kept under, defaults to the strategy and its parameters.
+    - on_transition (Callable[[str, Action], None]): Called with every BUY/SELL, defaults to printing it.
+    - iterations (int): Number of ticks to run, forever if None.
+    - concurrency (int): Maximum number of requests in flight at once.
+    - rate_limit (float): Maximum number of requests started per second, None for no limit.
+    - metrics_path (str): If given, instrumentation.metrics are written here after every tick, as Prometheus text
+      if it ends in .prom and JSON otherwise. See instrumentation.metrics.enable.
+    """
+
+    name = name or f"{strategy.__name__}{args}"
+    on_transition = on_transition or (lambda symbol, action: print(f"{time.strftime('%Y-%m-%d %H:%M:%S')} "
+                                                                   f"{symbol}: {action.value}", flush=True))
+
+    tick = 0
+    while iterations is None or tick < iterations:
+        with metrics.stage("tick", strategy=strategy.__name__):
+            await tick_once(exchange, watchlist, strategy, *args, store=store, name=name,
+                            on_transition=on_transition, concurrency=concurrency, rate_limit=rate_limit)
+        if metrics_path is not None:
+            metrics.write(metrics_path)
+        tick += 1
+        if iterations is None or tick < iterations:
+            await asyncio.sleep(interval - time.time() % interval)
+
+
+async def tick_once(exchange, watchlist: List[str], strategy: Callable[..., Action], *args, store: PositionStore,
+                    name: str, on_transition: Callable[[str, Action], None], concurrency: int = 16,
+                    rate_limit: Optional[float] = None) -> Dict[str, Action]:
+    """
+    Runs a single tick of the daemon and returns the transitions it applied.
+
+    Symbols that fail (EX: a network error) keep their position and are retried on the next tick.
+    """
+
+    errors: Dict[str, Exception] = {}
+    signals = await generate_signals(exchange, watchlist, strategy, *args, positions=store.positions(name),
+                                     concurrency=concurrency, rate_limit=rate_limit, errors=errors)
+
+    transitions = store.apply(name, signals)
+    for symbol, action in transitions.items():
+        on_transition(symbol, action)
+    for symbol, error in errors.items():
+        print(f"{symbol}: {type(error).__name__}: {error}", flush=True)
+    return transitions
@@ -0,0 +1,189 @@
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Sequence
+from algorithms import smoothing
+from strategies.backtesting import FEE, SLIPPAGE, crossover_positions, equity_curve, trend_positions
+from strategies.backtesting import breakout_signal, weighted_moving_average_signal
+from strategies.sweep import CHUNK_ELEMENTS
+
+import numpy as np
+
+# default number of synthetic price paths
+PATHS = 10000
+
+# default number of consecutive returns resampled together, about a month of daily bars: long enough to keep the
+# trends and volatility clusters the moving average strategies react to
+BLOCK_SIZE = 20
+
+
+@dataclass
+class MonteCarloResult:
+    """Outcome of a strategy on many resampled price paths, one entry per path."""
+    investment: float
+    historical_value: float  # final value of the same strategy on the historical prices
+    final_value: np.ndarray
+    max_drawdown: np.ndarray  # largest fractional drop of the equity curve from its running peak
+    trades: np.ndarray  # number of buys, every buy is closed by a sell or the final liquidation
+    hold_value: np.ndarray  # final value of buying at the first bar and selling at the last, on the same path
+
+    @property
+    def probability_of_loss(self) -> float:
+        """Fraction of the paths that end below the investment."""
+        return float(np.mean(self.final_value < self.investment))
+
+    @property
+    def probability_of_beating_hold(self) -> float:
+        """Fraction of the paths where the strategy ends above buy and hold."""
+        return float(np.mean(self.final_value > self.hold_value))
+
+    def final_value_percentiles(self, percentiles: Sequence[float] = (5, 25, 50, 75, 95)) -> Dict[float, float]:
+        """Returns the given percentiles of the final value over the paths."""
+        return dict(zip(percentiles, np.percentile(self.final_value, percentiles).tolist()))
+
+    def max_drawdown_percentiles(self, percentiles: Sequence[float] = (5, 25, 50, 75, 95)) -> Dict[float, float]:
+        """Returns the given percentiles of the maximum drawdown over the paths."""
+        return dict(zip(percentiles, np.percentile(self.max_drawdown, percentiles).tolist()))
+
+
+def bootstrap(prices: np.ndarray, paths: int = PATHS, block_size: int = BLOCK_SIZE, bars: Optional[int] = None,
+              seed: Optional[int] = None) -> np.ndarray:
+    """
+    Generates synthetic price paths with a moving block bootstrap of the historical returns.
+
+    Every path starts at the first historical price and follows log returns drawn in blocks of block_size
+    consecutive historical returns, so the short term structure the strategies trade on (trends, volatility
+    clusters) is kept while the order of the blocks is random.
+
+    Parameters:
+    - prices (np.ndarray): Historical closing prices, oldest first.
+    - paths (int): Number of paths to generate.
+    - block_size (int): Number of consecutive returns drawn together, at most len(prices) - 1.
+    - bars (int): Length of every path, defaults to len(prices).
+    - seed (int): Seed of the random generator, for reproducible paths.
+
+    Returns:
+    - np.ndarray: Prices of shape (paths, bars).
+    """
+
+    prices = np.asarray(prices, dtype=np.float64)
+    returns = np.diff(np.log(prices))
+    bars = len(prices) if bars is None else bars
+    if not 1 <= block_size <= len(returns):
+        raise ValueError(f"block_size must be between 1 and {len(returns)}, the number of returns")
+
+    generator = np.random.default_rng(seed)
+    blocks = -(-(bars - 1) // block_size)
+    starts = generator.integers(0, len(returns) - block_size + 1, size=(paths, blocks, 1))
+    indices = (starts + np.arange(block_size)).reshape(paths, -1)[:, :bars - 1]
+
+    log_prices = np.zeros((paths, bars))
+    np.cumsum(returns[indices], axis=1, out=log_prices[:, 1:])
+    return prices[0] * np.exp(log_prices)
+
+
+def run(prices: np.ndarray, investment: float, signal: Callable[..., np.ndarray], *args, paths: int = PATHS,
+        block_size: int = BLOCK_SIZE, bars: Optional[int] = None, seed: Optional[int] = None, fee: float = FEE,
+        slippage: float = SLIPPAGE) -> MonteCarloResult:
+    """
+    Backtests a strategy on many bootstrapped price paths at once, see bootstrap.
+
+    The paths are generated and simulated in chunks of (paths, bars) arrays: indicators, positions and equity
+    curves are computed for the whole chunk along the bar axis, never one path at a time.
+
+    Parameters:
+    - prices (np.ndarray): Historical closing prices to resample, oldest first.
+    - investment (float): Amount of money to begin each simulation with.
+    - signal (Callable): Positions of the strategy for prices of shape (paths, bars), EX:
+      strategies.backtesting.weighted_moving_average_signal.
+    - args: The signal's parameters after the prices, EX: window.
+    - paths (int): Number of paths to simulate.
+    - block_size (int): Number of consecutive returns drawn together.
+    - bars (int): Length of every path, defaults to len(prices).
+    - seed (int): Seed of the random generator, for reproducible paths.
+    - fee (float): Fraction of the traded value paid as fees on every buy and sell.
+    - slippage (float): Fraction by which fills are worse than the close.
+
+    Returns:
+    - MonteCarloResult: Final value, drawdown and trade count per path.
+    """
+
+    prices = np.asarray(prices, dtype=np.float64)
+    bars = len(prices) if bars is None else bars
+    generator = np.random.default_rng(seed)
+
+    final_value = np.empty(paths)
+    max_drawdown = np.empty(paths)
+    trades = np.empty(paths, dtype=np.int64)
+    hold_value = np.empty(paths)
+
+    chunk = max(1, CHUNK_ELEMENTS // max(1, bars))
+    for start in range(0, paths, chunk):
+        stop = min(start + chunk, paths)
+        resampled = bootstrap(prices, stop - start, block_size, bars, generator.integers(2**63))
+        positions = signal(resampled, *args)
+        equity = equity_curve(resampled, positions, investment, fee, slippage)
+        final_value[start:stop] = equity[:, -1]
+        max_drawdown[start:stop] = np.max(1 - equity / np.maximum.accumulate(equity, axis=1), axis=1)
+        trades[start:stop] = np.count_nonzero(positions[:, 1:] & ~positions[:, :-1], axis=1)
+        hold_value[start:stop] = resampled[:, -1] / resampled[:, 0]
+
+    # buying at the first close and selling at the last pays the costs twice
+    hold_value *= investment * (1 - fee) ** 2 * (1 - slippage) / (1 + slippage)
+
+    historical = equity_curve(prices, signal(prices, *args), investment, fee, slippage)
+    return MonteCarloResult(investment, float(historical[-1]), final_value, max_drawdown, trades, hold_value)
+
+
+# the paths are generated for a single run, smoothing them through algorithms.cache would only hash them and evict
+# the cached indicators of real series
+def _simple_moving_average_signal(prices: np.ndarray, window: int) -> np.ndarray:
+    return trend_positions(smoothing.simple_moving_average_array(prices, window))
+
+
+def _exponential_moving_average_signal(prices: np.ndarray, alpha: float) -> np.ndarray:
+    return trend_positions(smoothing.exponential_moving_average_array(prices, alpha))
+
+
+def _moving_average_crossover_signal(prices: np.ndarray, short_window: int, long_window: int) -> np.ndarray:
+    return crossover_positions(smoothing.simple_moving_average_array(prices, short_window),
+                               smoothing.simple_moving_average_array(prices, long_window))
+
+
+def _exponential_moving_average_crossover_signal(prices: np.ndarray, small_alpha: float,
+                                                 big_alpha: float) -> np.ndarray:
+    return crossover_positions(smoothing.exponential_moving_average_array(prices, big_alpha),
+                               smoothing.exponential_moving_average_array(prices, small_alpha))
+
+
+def simple_moving_average(prices: np.ndarray, investment: float, window: int, **options) -> MonteCarloResult:
+    """
+    Monte Carlo backtest of the simple moving average strategy, see run for the options (paths, block_size, bars,
+    seed, fee, slippage).
+    """
+    return run(prices, investment, _simple_moving_average_signal, window, **options)
+
+
+def exponential_moving_average(prices: np.ndarray, investment: float, alpha: float, **options) -> MonteCarloResult:
+    """Monte Carlo backtest of the exponential moving average strategy, see run for the options."""
+    return run(prices, investment, _exponential_moving_average_signal, alpha, **options)
+
+
+def moving_average_crossover(prices: np.ndarray, investment: float, short_window: int, long_window: int,
+                             **options) -> MonteCarloResult:
+    """Monte Carlo backtest of the moving average crossover strategy, see run for the options."""
+    return run(prices, investment, _moving_average_crossover_signal, short_window, long_window, **options)
+
+
+def exponential_moving_average_crossover(prices: np.ndarray, investment: float, small_alpha: float, big_alpha: float,
+                                         **options) -> MonteCarloResult:
+    """Monte Carlo backtest of the exponential moving average crossover strategy, see run for the options."""
+    return run(prices, investment, _exponential_moving_average_crossover_signal, small_alpha, big_alpha, **options)
+
+
+def weighted_moving_average(prices: np.ndarray, investment: float, window: int, **options) -> MonteCarloResult:
+    """Monte Carlo backtest of the weighted moving average strategy, see run for the options."""
+    return run(prices, investment, weighted_moving_average_signal, window, **options)
+
+
+def breakout(prices: np.ndarray, investment: float, window: int, **options) -> MonteCarloResult:
+    """Monte Carlo backtest of the channel breakout strategy, see run for the options."""
+    return run(prices, investment, breakout_signal, window, **options)
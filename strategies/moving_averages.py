@@ -1,7 +1,15 @@
 from enum import Enum
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional
 from algorithms import smoothing
+from data.candle_store import fetch_closes
+from instrumentation import metrics
 
-import ccxt
+# ccxt, asyncio and the thread pool are imported where they are used: ccxt's exchange catalog takes several hundred
+# milliseconds to import and asyncio tens, which evaluating a strategy on cached candles should not pay for
+if TYPE_CHECKING:
+    import asyncio
+    import ccxt
+    from data.rate_limit import RateLimiter
 
 class Position(Enum):
     """Indicates whether we are currently holding the asset."""
@@ -15,7 +23,7 @@ class Action(Enum):
     WAIT = "WAIT"
 
 
-def simple_moving_average(exchange: ccxt.Exchange, symbol: str, window: int, position: Position) -> Action:
+def simple_moving_average(exchange: "ccxt.Exchange", symbol: str, window: int, position: Position) -> Action:
     """
     Decides whether to buy, sell, or wait by analyzing a simple moving average.
 
@@ -30,8 +38,7 @@ def simple_moving_average(exchange: ccxt.Exchange, symbol: str, window: int, pos
     """
     
     # get asset prices for period of interest and compute moving averages
-    ohlcv = exchange.fetch_ohlcv(symbol, "1d", limit=window+1)
-    price_curve: List[float] = [ohlcv[i][4] for i in range(len(ohlcv))]
+    price_curve: List[float] = fetch_closes(exchange, symbol, "1d", window+1)
     averages: List[float] = smoothing.simple_moving_average(price_curve, window, approximate_start=True)
     
     # determine reccomended position given position and averages
@@ -45,7 +52,7 @@ def simple_moving_average(exchange: ccxt.Exchange, symbol: str, window: int, pos
         return Action.SELL
 
 
-def exponential_moving_average(exchange: ccxt.Exchange, symbol: str, window: int, alpha: float, position: Position) -> Action:
+def exponential_moving_average(exchange: "ccxt.Exchange", symbol: str, window: int, alpha: float, position: Position) -> Action:
     """
     Decides whether to buy, sell, or wait by analyzing an exponential moving average.
 
@@ -64,8 +71,7 @@ def exponential_moving_average(exchange: ccxt.Exchange, symbol: str, window: int
        raise ValueError("The Window parameter must be atleast two.")
 
     # get asset prices for period of interest and compute moving averages
-    ohlcv = exchange.fetch_ohlcv(symbol, "1d", limit=window)
-    price_curve: List[float] = [ohlcv[i][4] for i in range(len(ohlcv))]
+    price_curve: List[float] = fetch_closes(exchange, symbol, "1d", window)
     averages: List[float] = smoothing.exponential_moving_average(price_curve, alpha)
     
     # determine reccomended position given position and averages
@@ -79,7 +85,7 @@ def exponential_moving_average(exchange: ccxt.Exchange, symbol: str, window: int
         return Action.SELL
 
 
-def moving_average_crossover(exchange: ccxt.Exchange, symbol: str, short_window: int, long_window, position: Position) -> Action:
+def moving_average_crossover(exchange: "ccxt.Exchange", symbol: str, short_window: int, long_window, position: Position) -> Action:
     """
     Decides whether to buy, sell, or wait given the users position and by analyzing a moving average crossover.
 
@@ -95,8 +101,7 @@ def moving_average_crossover(exchange: ccxt.Exchange, symbol: str, short_window:
     """
     
     # get asset prices for period of interest and compute moving averages
-    ohlcv = exchange.fetch_ohlcv(symbol, "1d", limit=long_window)
-    price_curve: List[float] = [ohlcv[i][4] for i in range(len(ohlcv))]
+    price_curve: List[float] = fetch_closes(exchange, symbol, "1d", long_window)
     short_averages: List[float] = smoothing.simple_moving_average(price_curve, short_window, approximate_start=False)
     long_averages: List[float] = smoothing.simple_moving_average(price_curve, long_window, approximate_start=False)
     
@@ -111,7 +116,7 @@ def moving_average_crossover(exchange: ccxt.Exchange, symbol: str, short_window:
         return Action.SELL
 
 
-def exponential_moving_average_crossover(exchange: ccxt.Exchange, symbol: str, small_alpha: float, big_alpha: float,
+def exponential_moving_average_crossover(exchange: "ccxt.Exchange", symbol: str, small_alpha: float, big_alpha: float,
                                          position: Position) -> Action:
     """
     Decides whether to buy, sell, or wait given the users position and by analyzing an exponential moving average 
@@ -129,8 +134,7 @@ def exponential_moving_average_crossover(exchange: ccxt.Exchange, symbol: str, s
     """
     
     # get asset prices for period of interest and compute moving averages
-    ohlcv = exchange.fetch_ohlcv(symbol, "1d", limit=365)
-    price_curve: List[float] = [ohlcv[i][4] for i in range(len(ohlcv))]
+    price_curve: List[float] = fetch_closes(exchange, symbol, "1d", 365)
     long_averages: List[float] = smoothing.exponential_moving_average(price_curve, small_alpha)  # less reactive
     short_averages: List[float] = smoothing.exponential_moving_average(price_curve, big_alpha)  # more reactive
     
@@ -143,3 +147,197 @@ def exponential_moving_average_crossover(exchange: ccxt.Exchange, symbol: str, s
         return Action.BUY
     else:
         return Action.SELL
+
+
+def weighted_moving_average(exchange: "ccxt.Exchange", symbol: str, window: int, position: Position) -> Action:
+    """
+    Decides whether to buy, sell, or wait by analyzing a weighted moving average, which weighs the recent values
+    of the window more than a simple moving average does.
+
+    Parameters:
+    - exchange(ccxt.Exchange): The exchange we wish to trade on (ccxt)
+    - symbol (str): The symbol/ticker representing the asset to be traded
+    - window (int): The number of continuous values to consider for the moving average
+    - position (Position): Indicates whether the asset is currently being held
+
+    Returns:
+    - Action: The reccomended Action (buy, sell, or wait).
+    """
+
+    # get asset prices for period of interest and compute the last two moving averages
+    price_curve = fetch_closes(exchange, symbol, "1d", window+1)
+    averages = smoothing.weighted_moving_average_array(price_curve, window, approximate_start=True)
+
+    # determine reccomended position given position and averages
+    reccomended_position: Position = Position.IN if averages[-2] < averages[-1] else Position.OUT
+
+    if(reccomended_position == position):
+        return Action.WAIT
+    elif(reccomended_position == Position.IN and position == Position.OUT):
+        return Action.BUY
+    else:
+        return Action.SELL
+
+
+def breakout(exchange: "ccxt.Exchange", symbol: str, window: int, position: Position) -> Action:
+    """
+    Decides whether to buy, sell, or wait by analyzing a channel breakout: buy when the latest close is above the
+    highest of the "window" closes before it, sell when it is below the lowest, otherwise keep the position.
+
+    Parameters:
+    - exchange(ccxt.Exchange): The exchange we wish to trade on (ccxt)
+    - symbol (str): The symbol/ticker representing the asset to be traded
+    - window (int): The number of continuous values the channel spans
+    - position (Position): Indicates whether the asset is currently being held
+
+    Returns:
+    - Action: The reccomended Action (buy, sell, or wait).
+    """
+
+    # get asset prices for period of interest and compute the channel of the closes before the latest one
+    price_curve = fetch_closes(exchange, symbol, "1d", window+1)
+    upper = smoothing.rolling_max_array(price_curve[:-1], window)[-1]
+    lower = smoothing.rolling_min_array(price_curve[:-1], window)[-1]
+
+    # determine reccomended position given position and channel
+    if price_curve[-1] > upper:
+        reccomended_position = Position.IN
+    elif price_curve[-1] < lower:
+        reccomended_position = Position.OUT
+    else:
+        reccomended_position = position
+
+    if(reccomended_position == position):
+        return Action.WAIT
+    elif(reccomended_position == Position.IN and position == Position.OUT):
+        return Action.BUY
+    else:
+        return Action.SELL
+
+
+
+async def generate_signals(exchange, watchlist: List[str], strategy: Callable[..., Action], *args,
+                           positions: Optional[Dict[str, Position]] = None, concurrency: int = 16,
+                           rate_limit: Optional[float] = None,
+                           errors: Optional[Dict[str, Exception]] = None) -> Dict[str, Action]:
+    """
+    Runs one of the strategies above for every symbol of a watchlist, fetching candles concurrently.
+
+    Every fetch_ohlcv call the strategy makes is forwarded to the event loop and shares the single exchange
+    session, so the total latency is close to that of the slowest fetch rather than the sum of all fetches.
+
+    Parameters:
+    - exchange (ccxt.async_support.Exchange): The exchange we wish to trade on. Synchronous ccxt exchanges work
+      too, their requests run on worker threads. fetch_arrays and fetch_closes are used when the exchange has them.
+    - watchlist (List[str]): The symbols/tickers to evaluate. EX: ["BTC/USD", "DOGE/USD"]
+    - strategy (Callable): One of the strategies in this module, EX: moving_average_crossover.
+    - args: The strategy's parameters between symbol and position, EX: short_window, long_window.
+    - positions (Dict[str, Position]): Whether each asset is currently being held, missing symbols are OUT.
+    - concurrency (int): Maximum number of requests in flight at once.
+    - rate_limit (float): Maximum number of requests started per second, None for no limit.
+    - errors (Dict[str, Exception]): If given, symbols that fail are recorded here and left out of the result
+      instead of raising.
+
+    Returns:
+    - Dict[str, Action]: The reccomended Action for every symbol, in watchlist order.
+    """
+
+    import asyncio
+    from concurrent.futures import ThreadPoolExecutor
+    from data.rate_limit import RateLimiter
+
+    positions = positions or {}
+    bridge = _AsyncExchangeBridge(exchange, asyncio.get_running_loop(), asyncio.Semaphore(concurrency),
+                                  RateLimiter(rate_limit))
+
+    # the strategies are synchronous, so each one runs on a thread that waits on the event loop for its candles.
+    # every thread is awaited even if one fails, and the executor is never joined from here: the threads still
+    # running would wait forever on the event loop that joining them blocks. if this coroutine is cancelled, the
+    # fetches the threads wait on are cancelled too so that they finish on their own
+    executor = ThreadPoolExecutor(max_workers=max(1, min(len(watchlist), concurrency)))
+    try:
+        actions = await asyncio.gather(*[
+            asyncio.wrap_future(executor.submit(_decide, strategy, bridge, symbol, *args,
+                                                position=positions.get(symbol, Position.OUT)))
+            for symbol in watchlist], return_exceptions=True)
+    except asyncio.CancelledError:
+        bridge.cancel()
+        raise
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    signals: Dict[str, Action] = {}
+    for symbol, action in zip(watchlist, actions):
+        if isinstance(action, Exception):
+            if errors is None:
+                raise action
+            errors[symbol] = action
+        else:
+            signals[symbol] = action
+    return signals
+
+
+def _decide(strategy: Callable[..., Action], exchange, symbol: str, *args, position: Position) -> Action:
+    # one decision, timed per strategy and symbol when instrumentation is enabled
+    with metrics.stage("decision", strategy=strategy.__name__, symbol=symbol):
+        return strategy(exchange, symbol, *args, position=position)
+
+
+class _AsyncExchangeBridge:
+    """
+    Synchronous fetch_ohlcv for strategy threads, served by an exchange on the event loop.
+
+    fetch_arrays and fetch_closes are forwarded too when the exchange has them, so cached and replayed exchanges
+    keep their columnar fast paths.
+    """
+
+    def __init__(self, exchange, loop: "asyncio.AbstractEventLoop", semaphore: "asyncio.Semaphore",
+                 limiter: "RateLimiter"):
+        import functools
+        import threading
+        self.exchange = exchange
+        self.loop = loop
+        self.semaphore = semaphore
+        self.limiter = limiter
+        self.cancelled = False
+        self.pending = set()
+        self.lock = threading.Lock()
+        # set per instance so that hasattr in fetch_candles and fetch_closes sees what the exchange offers
+        for name in ("fetch_arrays", "fetch_closes"):
+            if hasattr(exchange, name):
+                setattr(self, name, functools.partial(self._forward, name))
+
+    def fetch_ohlcv(self, symbol: str, timeframe: str = "1m", since: Optional[int] = None,
+                    limit: Optional[int] = None, params: Optional[dict] = None) -> List[List]:
+        return self._forward("fetch_ohlcv", symbol, timeframe, since=since, limit=limit)
+
+    def cancel(self) -> None:
+        """Cancels the fetches in flight and refuses new ones, so the waiting strategy threads finish."""
+        with self.lock:
+            self.cancelled = True
+            for future in self.pending:
+                future.cancel()
+
+    def _forward(self, name: str, *args, **kwargs):
+        # runs exchange.<name>(*args, **kwargs) on the event loop and waits for it on the calling thread
+        import asyncio
+        from concurrent.futures import CancelledError
+        with self.lock:
+            if self.cancelled:
+                raise CancelledError()
+            future = asyncio.run_coroutine_threadsafe(self._call(name, *args, **kwargs), self.loop)
+            self.pending.add(future)
+        try:
+            return future.result()
+        finally:
+            with self.lock:
+                self.pending.discard(future)
+
+    async def _call(self, name: str, *args, **kwargs):
+        import asyncio
+        method = getattr(self.exchange, name)
+        async with self.semaphore:
+            await self.limiter.acquire()
+            if asyncio.iscoroutinefunction(method):
+                return await method(*args, **kwargs)
+            return await asyncio.to_thread(method, *args, **kwargs)
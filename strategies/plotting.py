@@ -0,0 +1,61 @@
+import os
+from typing import Dict, Optional
+from strategies.backtesting import BacktestResult
+
+# colors of the indicator curves, in the order the backtests store them
+COLORS = ("red", "blue", "orange", "purple")
+
+
+def plot(result: BacktestResult, path: Optional[str] = None) -> None:
+    """
+    Plots the prices, indicators and trades of a backtest.
+
+    matplotlib is only imported when something is plotted. Figures written to a file are drawn without pyplot,
+    so no display is needed and no figure is left behind.
+
+    Parameters:
+    - result (BacktestResult): The backtest to plot.
+    - path (str): File to write the figure to, EX: "btc.png". If None the figure is shown in a window.
+    """
+
+    if path is None:
+        import matplotlib.pyplot as plt
+
+        figure = plt.figure()
+        _draw(figure, result)
+        plt.show()
+        plt.close(figure)
+    else:
+        from matplotlib.figure import Figure
+
+        figure = Figure()
+        _draw(figure, result)
+        figure.savefig(path)
+
+
+def save_all(results: Dict[str, BacktestResult], directory: str, extension: str = "png") -> None:
+    """
+    Writes one figure per backtest, EX: results from a sweep or a parallel run.
+
+    Parameters:
+    - results (Dict[str, BacktestResult]): The backtests to plot, keyed by the file name to use (without extension).
+    - directory (str): Directory the figures are written to, created if missing.
+    - extension (str): Image format, anything matplotlib can write (png, svg, pdf, ...).
+    """
+
+    os.makedirs(directory, exist_ok=True)
+    for name, result in results.items():
+        plot(result, os.path.join(directory, f"{name.replace('/', '-')}.{extension}"))
+
+
+def _draw(figure, result: BacktestResult) -> None:
+    axes = figure.add_subplot()
+
+    # plot lines
+    axes.plot(result.prices, color="black")
+    for color, (name, curve) in zip(COLORS, result.indicators.items()):
+        axes.plot(curve, color=color, label=name)
+
+    # plot buy and sell points
+    axes.scatter(result.buys, result.prices[result.buys], color="green")
+    axes.scatter(result.sells, result.prices[result.sells], color="red")
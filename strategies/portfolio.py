@@ -0,0 +1,138 @@
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+from data.candle_store import fetch_candles
+from data.ohlcv import OHLCV
+from strategies.backtesting import FEE, SLIPPAGE
+
+import numpy as np
+
+
+@dataclass
+class PortfolioResult:
+    """Outcome of a portfolio simulation, per-symbol arrays have one row per symbol and one column per bar."""
+    symbols: List[str]
+    timestamps: np.ndarray  # the common timestamp index
+    weights: np.ndarray  # fraction of the portfolio held in each symbol at the close of every bar
+    equity: np.ndarray  # portfolio value at the close of every bar
+    final_value: float  # value after the simulation, open positions are liquidated at the last prices
+
+    @property
+    def exposure(self) -> np.ndarray:
+        """Fraction of the portfolio invested at the close of every bar."""
+        return self.weights.sum(axis=0)
+
+    @property
+    def max_drawdown(self) -> float:
+        """Largest fractional drop of the equity curve from its running peak."""
+        return float(np.max(1 - self.equity / np.maximum.accumulate(self.equity)))
+
+
+def align(candles: Dict[str, OHLCV]) -> Tuple[List[str], np.ndarray, np.ndarray]:
+    """
+    Aligns the candles of many symbols on a common timestamp index.
+
+    Parameters:
+    - candles (Dict[str, OHLCV]): Candles per symbol, EX: the output of load.
+
+    Returns:
+    - Tuple[List[str], np.ndarray, np.ndarray]: The symbols, the union of all timestamps, and a (symbols, bars)
+      matrix of closing prices. A missing candle repeats the previous close, bars before a symbol's first candle
+      are NaN.
+    """
+
+    symbols = list(candles)
+    timestamps = np.unique(np.concatenate([np.asarray(candles[symbol]["timestamp"], dtype=np.int64)
+                                           for symbol in symbols]))
+
+    prices = np.full((len(symbols), len(timestamps)), np.nan)
+    for row, symbol in enumerate(symbols):
+        bars = np.searchsorted(timestamps, np.asarray(candles[symbol]["timestamp"], dtype=np.int64))
+        prices[row, bars] = candles[symbol]["close"]
+
+    return symbols, timestamps, _forward_fill(prices)
+
+
+def load(exchange, symbols: List[str], timeframe: str = "1h",
+         limit: Optional[int] = None) -> Dict[str, OHLCV]:
+    """
+    Fetches the candles of many symbols, ready for align.
+    """
+
+    return {symbol: fetch_candles(exchange, symbol, timeframe, limit) for symbol in symbols}
+
+
+def backtest(symbols: List[str], timestamps: np.ndarray, prices: np.ndarray, investment: float,
+             signal: Callable[..., np.ndarray], sizing: str = "equal", fraction: Optional[float] = None,
+             fee: float = FEE, slippage: float = SLIPPAGE, **parameters) -> PortfolioResult:
+    """
+    Simulates a strategy on many symbols sharing one pool of cash.
+
+    The signal is applied to the whole price matrix at once. At the close of every bar the portfolio is
+    rebalanced to the target weight of every symbol the signal holds. Fees and slippage are charged on the value
+    actually traded: the difference between the weights the holdings drifted to over the bar and the new targets,
+    so trades that only correct price drift are paid for too. Open positions are sold at the last close.
+
+    Parameters:
+    - symbols (List[str]): The symbols, one per row of prices. EX: the output of align.
+    - timestamps (np.ndarray): The common timestamp index, one per column of prices.
+    - prices (np.ndarray): (symbols, bars) matrix of closing prices, NaN before a symbol is listed.
+    - investment (float): Amount of money to begin the simulation with.
+    - signal (Callable): A position function from strategies.backtesting, EX: moving_average_crossover_signal.
+    - sizing (str): "equal" splits the portfolio evenly between the held symbols, "fixed" gives every held symbol
+      "fraction" of the portfolio (scaled down when the total would exceed the portfolio).
+    - fraction (float): Weight per symbol for "fixed" sizing.
+    - fee (float): Fraction of the traded value paid as fees on every buy and sell.
+    - slippage (float): Fraction by which fills are worse than the close.
+    - parameters: Passed on to the signal, EX: short_window=3, long_window=21.
+
+    Returns:
+    - PortfolioResult: Weights, exposure and equity of the portfolio.
+    """
+
+    prices = np.asarray(prices, dtype=np.float64)
+    listed = ~np.isnan(prices)
+
+    # before listing a symbol's price is flat at its first close, which no moving average strategy trades on
+    positions = signal(_backward_fill(prices), **parameters) & listed
+
+    # target weights of every symbol at the close of every bar
+    held = positions.sum(axis=0)
+    if sizing == "equal":
+        weights = positions / np.maximum(held, 1)
+    elif sizing == "fixed":
+        if fraction is None:
+            raise ValueError("fixed sizing needs a fraction")
+        weights = positions * (fraction / np.maximum(held * fraction, 1))
+    else:
+        raise ValueError(f"unknown sizing {sizing!r}")
+
+    # portfolio return of a bar is the weighted return of the symbols held at the previous close
+    returns = np.zeros_like(prices)
+    with np.errstate(invalid="ignore"):
+        returns[:, 1:] = np.nan_to_num(prices[:, 1:] / prices[:, :-1] - 1)
+    growth = np.ones(prices.shape[1])
+    growth[1:] += np.sum(weights[:, :-1] * returns[:, 1:], axis=0)
+
+    # weights the holdings drifted to by the close, before rebalancing
+    drifted = np.zeros_like(weights)
+    drifted[:, 1:] = weights[:, :-1] * (1 + returns[:, 1:]) / growth[1:]
+
+    # trading costs on the value traded to get back to the targets, open positions are sold at the end
+    turnover = np.abs(weights - drifted).sum(axis=0)
+    turnover[-1] = drifted[:, -1].sum()
+    growth *= 1 - turnover * (fee + slippage)
+
+    equity = investment * np.cumprod(growth)
+    return PortfolioResult(symbols, timestamps, weights, equity, float(equity[-1]))
+
+
+def _forward_fill(prices: np.ndarray) -> np.ndarray:
+    # repeat the last known price along the last axis
+    bars = np.where(np.isnan(prices), 0, np.arange(prices.shape[-1]))
+    np.maximum.accumulate(bars, axis=-1, out=bars)
+    return np.take_along_axis(prices, bars, axis=-1)
+
+
+def _backward_fill(prices: np.ndarray) -> np.ndarray:
+    # replace the leading NaNs of every row with its first price
+    return _forward_fill(prices[..., ::-1])[..., ::-1] if np.isnan(prices).any() else prices
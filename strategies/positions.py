@@ -0,0 +1,99 @@
+import sqlite3
+import time
+from typing import Dict, List, Optional, Tuple
+from strategies.moving_averages import Action, Position
+
+
+class PositionStore:
+    """
+    Persistent per-symbol positions, kept in a single SQLite file.
+
+    Positions are keyed by a strategy name and a symbol, so several strategies can track the same watchlist. Every
+    applied BUY/SELL is also appended to a transitions table, which doubles as an audit log of the recommendations.
+    """
+
+    def __init__(self, path: str):
+        """
+        Parameters:
+        - path (str): SQLite database file, created if missing. EX: "positions.db".
+        """
+
+        self.path = path
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        with self.connection:
+            self.connection.execute("CREATE TABLE IF NOT EXISTS positions (strategy TEXT NOT NULL, "
+                                    "symbol TEXT NOT NULL, position TEXT NOT NULL, updated REAL NOT NULL, "
+                                    "PRIMARY KEY (strategy, symbol)) WITHOUT ROWID")
+            self.connection.execute("CREATE TABLE IF NOT EXISTS transitions (time REAL NOT NULL, "
+                                    "strategy TEXT NOT NULL, symbol TEXT NOT NULL, action TEXT NOT NULL)")
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def get(self, strategy: str, symbol: str) -> Position:
+        """
+        Returns the position held in one symbol, OUT if it was never recorded.
+        """
+
+        row = self.connection.execute("SELECT position FROM positions WHERE strategy = ? AND symbol = ?",
+                                      (strategy, symbol)).fetchone()
+        return Position(row[0]) if row else Position.OUT
+
+    def positions(self, strategy: str) -> Dict[str, Position]:
+        """
+        Returns every recorded position of a strategy, keyed by symbol.
+        """
+
+        rows = self.connection.execute("SELECT symbol, position FROM positions WHERE strategy = ?", (strategy,))
+        return {symbol: Position(position) for symbol, position in rows}
+
+    def set(self, strategy: str, symbol: str, position: Position) -> None:
+        """
+        Overwrites a position without recording a transition, EX: to correct for a trade that was not made.
+        """
+
+        with self.connection:
+            self._upsert(strategy, [(symbol, position)], time.time())
+
+    def apply(self, strategy: str, actions: Dict[str, Action]) -> Dict[str, Action]:
+        """
+        Updates the positions with the recommended actions, BUY moves a symbol IN and SELL moves it OUT.
+
+        Parameters:
+        - strategy (str): Name the positions are kept under.
+        - actions (Dict[str, Action]): Recommended action per symbol, EX: the output of generate_signals.
+
+        Returns:
+        - Dict[str, Action]: The BUY and SELL actions that were applied, WAIT is dropped.
+        """
+
+        transitions = {symbol: action for symbol, action in actions.items() if action != Action.WAIT}
+        if not transitions:
+            return transitions
+
+        now = time.time()
+        with self.connection:
+            self._upsert(strategy, [(symbol, Position.IN if action == Action.BUY else Position.OUT)
+                                    for symbol, action in transitions.items()], now)
+            self.connection.executemany("INSERT INTO transitions VALUES (?, ?, ?, ?)",
+                                        [(now, strategy, symbol, action.value)
+                                         for symbol, action in transitions.items()])
+        return transitions
+
+    def history(self, strategy: Optional[str] = None, limit: int = 100) -> List[Tuple[float, str, str, Action]]:
+        """
+        Returns the most recent transitions, newest first, as (time, strategy, symbol, action).
+        """
+
+        query = "SELECT time, strategy, symbol, action FROM transitions"
+        arguments: tuple = ()
+        if strategy is not None:
+            query += " WHERE strategy = ?"
+            arguments = (strategy,)
+        rows = self.connection.execute(query + " ORDER BY rowid DESC LIMIT ?", arguments + (limit,))
+        return [(moment, name, symbol, Action(action)) for moment, name, symbol, action in rows]
+
+    def _upsert(self, strategy: str, positions: List[Tuple[str, Position]], now: float) -> None:
+        self.connection.executemany("INSERT INTO positions VALUES (?, ?, ?, ?) ON CONFLICT (strategy, symbol) "
+                                    "DO UPDATE SET position = excluded.position, updated = excluded.updated",
+                                    [(strategy, symbol, position.value, now) for symbol, position in positions])
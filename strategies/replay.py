@@ -0,0 +1,101 @@
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from strategies.moving_averages import Action, Position
+
+import numpy as np
+
+
+@dataclass
+class ReplayResult:
+    """
+    Decisions of a live strategy replayed bar by bar, see replay. Arrays are (symbols, bars), bars in replay order.
+    """
+    symbols: List[str]
+    timestamps: np.ndarray  # timestamp (ms) of every replayed bar
+    actions: np.ndarray  # Action recommended for every symbol at every bar, None where the strategy raised
+    positions: np.ndarray  # True where the asset is held after the decision at that bar
+    latencies: np.ndarray  # seconds every call to the strategy took
+    errors: Dict[Tuple[str, int], Exception]  # (symbol, bar timestamp) of the calls that raised
+
+    @property
+    def calls(self) -> int:
+        return self.latencies.size
+
+    def latency_percentiles(self, percentiles: Sequence[float] = (50, 90, 99)) -> Dict[float, float]:
+        """
+        Returns the given percentiles of the per-call latency, in seconds.
+        """
+
+        return dict(zip(percentiles, np.percentile(self.latencies, percentiles).tolist()))
+
+    def mismatches(self, expected: np.ndarray) -> List[Tuple[str, int]]:
+        """
+        Compares the replayed positions with the positions a backtest holds at the same bars, EX: a
+        strategies.backtesting *_signal of the same closes.
+
+        Parameters:
+        - expected (np.ndarray): Positions of shape (symbols, bars) or (bars,) for a single symbol.
+
+        Returns:
+        - List[Tuple[str, int]]: (symbol, bar timestamp) of every bar where the positions differ.
+        """
+
+        symbols, bars = np.nonzero(np.broadcast_to(expected, self.positions.shape) != self.positions)
+        return [(self.symbols[symbol], int(self.timestamps[bar])) for symbol, bar in zip(symbols, bars)]
+
+
+def replay(exchange, watchlist: List[str], strategy: Callable[..., Action], *args,
+           positions: Optional[Dict[str, Position]] = None, bars: Optional[int] = None) -> ReplayResult:
+    """
+    Drives a live strategy bar by bar over recorded candles, recording every decision and how long it took.
+
+    At every bar of the replay the strategy is called once per symbol with the position left by its previous
+    decisions, exactly as a daemon would call it, then the clock advances. A strategy that raises (EX: not enough
+    candles yet at the start of the recording) keeps its position and is recorded in errors.
+
+    Parameters:
+    - exchange (data.replay.ReplayExchange): Exchange replaying the candles, from its current bar. May be wrapped in
+      a data.resample.ResamplingExchange.
+    - watchlist (List[str]): The symbols/tickers to evaluate. EX: ["BTC/USD", "DOGE/USD"]
+    - strategy (Callable): One of the strategies in strategies.moving_averages, EX: moving_average_crossover.
+    - args: The strategy's parameters between symbol and position, EX: short_window, long_window.
+    - positions (Dict[str, Position]): Whether each asset is held at the start, missing symbols are OUT.
+    - bars (int): Number of bars to replay, up to the end of the recording if None.
+
+    Returns:
+    - ReplayResult: Actions, positions and latencies of every call.
+    """
+
+    remaining = len(exchange.timestamps) - exchange.bar
+    bars = remaining if bars is None else min(bars, remaining)
+    held = [(positions or {}).get(symbol, Position.OUT) for symbol in watchlist]
+
+    timestamps = np.empty(bars, dtype=np.int64)
+    actions = np.full((len(watchlist), bars), None, dtype=object)
+    held_after = np.zeros((len(watchlist), bars), dtype=bool)
+    latencies = np.empty((len(watchlist), bars))
+    errors: Dict[Tuple[str, int], Exception] = {}
+
+    for bar in range(bars):
+        if bar > 0:
+            exchange.advance()
+        timestamps[bar] = exchange.timestamp
+
+        for index, symbol in enumerate(watchlist):
+            started = time.perf_counter()
+            try:
+                action = strategy(exchange, symbol, *args, position=held[index])
+            except Exception as error:
+                action = None
+                errors[(symbol, int(timestamps[bar]))] = error
+            latencies[index, bar] = time.perf_counter() - started
+
+            if action == Action.BUY:
+                held[index] = Position.IN
+            elif action == Action.SELL:
+                held[index] = Position.OUT
+            actions[index, bar] = action
+            held_after[index, bar] = held[index] == Position.IN
+
+    return ReplayResult(list(watchlist), timestamps, actions, held_after, latencies, errors)
@@ -0,0 +1,144 @@
+import inspect
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from data.candle_store import fetch_candles
+from data.ohlcv import COLUMNS, OHLCV
+from strategies.backtesting import BacktestResult
+
+import numpy as np
+
+# candles shared with the worker processes, keyed by (symbol, timeframe, limit)
+_candles: Dict[Tuple[str, str, int], np.ndarray] = {}
+_segments: List[shared_memory.SharedMemory] = []
+
+
+@dataclass
+class Job:
+    """A single backtest: strategy(exchange, symbol, **params)."""
+    symbol: str
+    strategy: Callable[..., BacktestResult]  # a backtest function from strategies.backtesting
+    params: Dict[str, Any] = field(default_factory=dict)  # EX: {"investment": 1000, "window": 21}
+
+
+@dataclass
+class JobResult:
+    """Outcome of a Job, exactly one of value and error is set."""
+    job: Job
+    value: Optional[BacktestResult] = None
+    error: Optional[str] = None
+
+
+class SharedCandleExchange:
+    """
+    Read-only stand-in for a ccxt exchange that serves candles preloaded into shared memory.
+
+    Candles are stored column-major, so fetch_closes hands out a contiguous view without copying.
+    """
+
+    def __init__(self, candles: Dict[Tuple[str, str, int], np.ndarray]):
+        self.candles = candles
+
+    def _columns(self, symbol: str, timeframe: str, limit: Optional[int]) -> np.ndarray:
+        for (candle_symbol, candle_timeframe, candle_limit), columns in self.candles.items():
+            # a series downloaded without a limit is the whole series the exchange serves
+            if (candle_symbol == symbol and candle_timeframe == timeframe
+                    and (candle_limit is None or (limit or 0) <= candle_limit)):
+                return columns if limit is None else columns[:, -limit:]
+        raise KeyError(f"no candles loaded for {symbol} {timeframe} (limit={limit})")
+
+    def fetch_arrays(self, symbol: str, timeframe: str = "1m", limit: Optional[int] = None) -> OHLCV:
+        # prices and volume are views of the shared memory, only the timestamps are converted to integers
+        return OHLCV(dict(zip(COLUMNS, self._columns(symbol, timeframe, limit))))
+
+    def fetch_closes(self, symbol: str, timeframe: str = "1m", limit: Optional[int] = None) -> np.ndarray:
+        return self._columns(symbol, timeframe, limit)[4]
+
+    def fetch_ohlcv(self, symbol: str, timeframe: str = "1m", since: Optional[int] = None,
+                    limit: Optional[int] = None, params: Optional[dict] = None) -> np.ndarray:
+        return self._columns(symbol, timeframe, limit).T
+
+
+def run(exchange, jobs: List[Job], processes: Optional[int] = None) -> List[JobResult]:
+    """
+    Runs backtests in parallel on a pool of worker processes.
+
+    Candles are downloaded once per (symbol, timeframe, limit) in this process, paginated like any other series
+    (see data.candle_store.fetch_candles), and handed to the workers through shared memory, so price data is never
+    pickled. A job that raises, or whose strategy takes no timeframe or limit, only fails itself.
+
+    Parameters:
+    - exchange (ccxt.exchange): Exchange to download the candles from.
+    - jobs (List[Job]): Backtests to run.
+    - processes (int): Number of worker processes, defaults to the number of CPUs.
+
+    Returns:
+    - List[JobResult]: One result per job, in the same order as jobs.
+    """
+
+    results: List[Optional[JobResult]] = [None] * len(jobs)
+    requests: Dict[Tuple[str, str, int], List[int]] = {}
+    for i, job in enumerate(jobs):
+        try:
+            requests.setdefault(_candle_request(job), []).append(i)
+        except TypeError as error:
+            results[i] = JobResult(job, error=f"{type(error).__name__}: {error}")
+
+    segments: List[shared_memory.SharedMemory] = []
+    try:
+        # download every series once and copy it into shared memory
+        descriptors = []
+        for (symbol, timeframe, limit), indices in requests.items():
+            try:
+                candles = fetch_candles(exchange, symbol, timeframe, limit)
+            except Exception as error:
+                for i in indices:
+                    results[i] = JobResult(jobs[i], error=f"{type(error).__name__}: {error}")
+                continue
+
+            columns = np.vstack([candles[column].astype(np.float64) for column in COLUMNS])
+            segment = shared_memory.SharedMemory(create=True, size=max(1, columns.nbytes))
+            segments.append(segment)
+            np.ndarray(columns.shape, dtype=np.float64, buffer=segment.buf)[:] = columns
+            descriptors.append(((symbol, timeframe, limit), segment.name, columns.shape))
+
+        pending = [i for i, result in enumerate(results) if result is None]
+        processes = processes or os.cpu_count() or 1
+        chunksize = max(1, len(pending) // (processes * 4))
+
+        with ProcessPoolExecutor(processes, initializer=_attach, initargs=(descriptors,)) as executor:
+            for i, result in zip(pending, executor.map(_run_job, [jobs[i] for i in pending], chunksize=chunksize)):
+                results[i] = result
+    finally:
+        for segment in segments:
+            segment.close()
+            segment.unlink()
+
+    return results
+
+
+def _candle_request(job: Job) -> Tuple[str, str, int]:
+    # the candles a backtest will fetch, taking the strategy's default timeframe and limit into account
+    arguments = inspect.signature(job.strategy).bind(None, job.symbol, **job.params)
+    arguments.apply_defaults()
+    missing = [name for name in ("timeframe", "limit") if name not in arguments.arguments]
+    if missing:
+        raise TypeError(f"{job.strategy.__name__}() has no {' or '.join(missing)} parameter")
+    return job.symbol, arguments.arguments["timeframe"], arguments.arguments["limit"]
+
+
+def _attach(descriptors: List[Tuple[Tuple[str, str, int], str, Tuple[int, int]]]) -> None:
+    # worker initializer: map every shared candle series
+    for key, name, shape in descriptors:
+        segment = shared_memory.SharedMemory(name=name)
+        _segments.append(segment)
+        _candles[key] = np.ndarray(shape, dtype=np.float64, buffer=segment.buf)
+
+
+def _run_job(job: Job) -> JobResult:
+    try:
+        return JobResult(job, value=job.strategy(SharedCandleExchange(_candles), job.symbol, **job.params))
+    except Exception as error:
+        return JobResult(job, error=f"{type(error).__name__}: {error}")
@@ -0,0 +1,222 @@
+import abc
+from typing import Iterable, Optional
+from algorithms.streaming import (ExponentialMovingAverage, RollingMax, RollingMin, SimpleMovingAverage,
+                                  WeightedMovingAverage)
+from strategies.moving_averages import Action, Position
+
+
+class _Signal(abc.ABC):
+    """
+    Base class of the streaming strategies. Candles are fed in one at a time and a Position is emitted whenever
+    the recommended position changes.
+    """
+
+    __slots__ = ("position",)
+
+    def __init__(self, position: Position):
+        self.position = position
+
+    @abc.abstractmethod
+    def _recommend(self, close: float) -> Optional[Position]:
+        # the recommended position after this close, None to keep the current one
+        ...
+
+    def update(self, close: float) -> Optional[Position]:
+        """
+        Feeds the closing price of a new candle.
+
+        Parameters:
+        - close (float): Closing price of the newest candle.
+
+        Returns:
+        - Optional[Position]: The new recommended position if it changed with this candle, None otherwise.
+        """
+
+        reccomended_position = self._recommend(close)
+        if reccomended_position is None or reccomended_position == self.position:
+            return None
+
+        self.position = reccomended_position
+        return reccomended_position
+
+    def prime(self, closes: Iterable[float]) -> Position:
+        """
+        Feeds historical closing prices, oldest first, without reporting the changes, and returns the resulting
+        position.
+        """
+
+        for close in closes:
+            self.update(close)
+        return self.position
+
+    def action(self, position: Position) -> Action:
+        """
+        Returns the reccomended Action (buy, sell, or wait) for a holder of the given position.
+        """
+
+        if self.position == position:
+            return Action.WAIT
+        return Action.BUY if self.position == Position.IN else Action.SELL
+
+
+class SimpleMovingAverageSignal(_Signal):
+    """Streaming counterpart of moving_averages.simple_moving_average: IN while the SMA rises, OUT while it falls."""
+
+    __slots__ = ("average", "_previous")
+
+    def __init__(self, window: int, position: Position = Position.OUT):
+        """
+        Parameters:
+        - window (int): The number of continuous values to consider for the moving average
+        - position (Position): Indicates whether the asset is currently being held
+        """
+
+        super().__init__(position)
+        self.average = SimpleMovingAverage(window)
+        self._previous: Optional[float] = None
+
+    def _recommend(self, close: float) -> Optional[Position]:
+        previous, current = self._previous, self.average.update(close)
+        self._previous = current
+
+        if previous is None or previous == current:
+            return None
+        return Position.IN if previous < current else Position.OUT
+
+
+class ExponentialMovingAverageSignal(_Signal):
+    """Streaming counterpart of moving_averages.exponential_moving_average: IN while the EMA rises."""
+
+    __slots__ = ("average", "_previous")
+
+    def __init__(self, alpha: float, position: Position = Position.OUT):
+        """
+        Parameters:
+        - alpha (float): The smoothing parameter for our EMA, 0 <= alpha <= 1
+        - position (Position): Indicates whether the asset is currently being held
+        """
+
+        super().__init__(position)
+        self.average = ExponentialMovingAverage(alpha)
+        self._previous: Optional[float] = None
+
+    def _recommend(self, close: float) -> Optional[Position]:
+        previous, current = self._previous, self.average.update(close)
+        self._previous = current
+
+        if previous is None or previous == current:
+            return None
+        return Position.IN if previous < current else Position.OUT
+
+
+class WeightedMovingAverageSignal(_Signal):
+    """Streaming counterpart of moving_averages.weighted_moving_average: IN while the WMA rises, OUT while it falls."""
+
+    __slots__ = ("average", "_previous")
+
+    def __init__(self, window: int, position: Position = Position.OUT):
+        """
+        Parameters:
+        - window (int): The number of continuous values to consider for the moving average
+        - position (Position): Indicates whether the asset is currently being held
+        """
+
+        super().__init__(position)
+        self.average = WeightedMovingAverage(window)
+        self._previous: Optional[float] = None
+
+    def _recommend(self, close: float) -> Optional[Position]:
+        previous, current = self._previous, self.average.update(close)
+        self._previous = current
+
+        if previous is None or previous == current:
+            return None
+        return Position.IN if previous < current else Position.OUT
+
+
+class BreakoutSignal(_Signal):
+    """
+    Streaming counterpart of moving_averages.breakout: IN once a close is above the highest of the "window" closes
+    before it, OUT once it is below the lowest.
+    """
+
+    __slots__ = ("upper", "lower")
+
+    def __init__(self, window: int, position: Position = Position.OUT):
+        """
+        Parameters:
+        - window (int): The number of continuous values the channel spans
+        - position (Position): Indicates whether the asset is currently being held
+        """
+
+        super().__init__(position)
+        self.upper = RollingMax(window)
+        self.lower = RollingMin(window)
+
+    def _recommend(self, close: float) -> Optional[Position]:
+        # compare against the channel of the previous closes before adding this one, like the live strategy nothing
+        # is emitted before "window" previous closes exist
+        ready, upper, lower = self.upper.ready, self.upper.value, self.lower.value
+        self.upper.update(close)
+        self.lower.update(close)
+
+        if not ready:
+            return None
+        if close > upper:
+            return Position.IN
+        return Position.OUT if close < lower else None
+
+
+class MovingAverageCrossoverSignal(_Signal):
+    """
+    Streaming counterpart of moving_averages.moving_average_crossover: IN while the short SMA is above the long SMA.
+    Nothing is emitted until a full long window has been seen.
+    """
+
+    __slots__ = ("short_average", "long_average")
+
+    def __init__(self, short_window: int, long_window: int, position: Position = Position.OUT):
+        """
+        Parameters:
+        - short_window (int): The number of continuous values to consider for the shorter moving averages
+        - long_window (int): The number of continuous values to consider for the longer moving averages
+        - position (Position): Indicates whether the asset is currently being held
+        """
+
+        super().__init__(position)
+        self.short_average = SimpleMovingAverage(short_window)
+        self.long_average = SimpleMovingAverage(long_window)
+
+    def _recommend(self, close: float) -> Optional[Position]:
+        short_average = self.short_average.update(close)
+        long_average = self.long_average.update(close)
+
+        if not self.long_average.ready:
+            return None
+        return Position.IN if long_average < short_average else Position.OUT
+
+
+class ExponentialMovingAverageCrossoverSignal(_Signal):
+    """
+    Streaming counterpart of moving_averages.exponential_moving_average_crossover: IN while the more reactive EMA
+    (big_alpha) is above the less reactive one (small_alpha).
+    """
+
+    __slots__ = ("short_average", "long_average")
+
+    def __init__(self, small_alpha: float, big_alpha: float, position: Position = Position.OUT):
+        """
+        Parameters:
+        - small_alpha (float): The smoothing parameter of the less reactive EMA, 0 <= alpha <= 1
+        - big_alpha (float): The smoothing parameter of the more reactive EMA, 0 <= alpha <= 1
+        - position (Position): Indicates whether the asset is currently being held
+        """
+
+        super().__init__(position)
+        self.short_average = ExponentialMovingAverage(big_alpha)  # more reactive
+        self.long_average = ExponentialMovingAverage(small_alpha)  # less reactive
+
+    def _recommend(self, close: float) -> Optional[Position]:
+        short_average = self.short_average.update(close)
+        long_average = self.long_average.update(close)
+        return Position.IN if long_average < short_average else Position.OUT
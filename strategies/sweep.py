@@ -0,0 +1,177 @@
+from dataclasses import dataclass
+from typing import Dict, List, Sequence, Tuple
+from algorithms.cache import default_cache, fingerprint
+from strategies.backtesting import FEE, SLIPPAGE, crossover_positions, equity_curve
+
+import numpy as np
+
+# upper bound on bars x parameter pairs evaluated at once, keeps the batched arrays around 32MB each
+CHUNK_ELEMENTS = 1 << 22
+
+
+@dataclass
+class SweepResult:
+    """Outcome of a parameter sweep, one entry per evaluated parameter pair."""
+    parameter_names: Tuple[str, str]
+    parameters: np.ndarray  # (pairs, 2)
+    final_value: np.ndarray
+    trades: np.ndarray  # number of buys, every buy is closed by a sell or the final liquidation
+    max_drawdown: np.ndarray  # largest fractional drop of the equity curve from its running peak
+
+    def best(self) -> Dict[str, float]:
+        """Returns the row with the highest final value."""
+        return self.rows()[int(np.argmax(self.final_value))]
+
+    def rows(self) -> List[Dict[str, float]]:
+        """Returns the results as a list of table rows."""
+        return [{self.parameter_names[0]: first, self.parameter_names[1]: second, "final_value": value,
+                 "trades": trades, "max_drawdown": drawdown}
+                for (first, second), value, trades, drawdown in zip(self.parameters.tolist(),
+                                                                     self.final_value.tolist(),
+                                                                     self.trades.tolist(),
+                                                                     self.max_drawdown.tolist())]
+
+
+def moving_average_crossover(prices: np.ndarray, investment: float, short_windows: Sequence[int],
+                             long_windows: Sequence[int], fee: float = FEE,
+                             slippage: float = SLIPPAGE) -> SweepResult:
+    """
+    Backtest the moving average crossover strategy for every (short_window, long_window) pair of a grid.
+
+    Every distinct window is smoothed once and all pairs are simulated together, the results match running
+    strategies.backtesting.moving_average_crossover once per pair on the same prices. An empty grid, or one where
+    no short window is shorter than a long window, raises a ValueError.
+
+    Parameters:
+    - prices (np.ndarray): Closing prices to backtest on, oldest first.
+    - investment (float): Amount of money to begin each simulation with.
+    - short_windows (Sequence[int]): Candidate windows for the shorter moving average.
+    - long_windows (Sequence[int]): Candidate windows for the longer moving average, pairs where the short
+      window is not shorter than the long window are skipped.
+    - fee (float): Fraction of the traded value paid as fees on every buy and sell.
+    - slippage (float): Fraction by which fills are worse than the close.
+
+    Returns:
+    - SweepResult: Final value, trade count and drawdown per (short_window, long_window) pair.
+    """
+
+    prices = np.asarray(prices, dtype=np.float64)
+    averages, indices, pairs = window_grid(prices, short_windows, long_windows)
+    return evaluate(prices, investment, averages, indices, pairs, ("short_window", "long_window"), fee, slippage)
+
+
+def exponential_moving_average_crossover(prices: np.ndarray, investment: float, small_alphas: Sequence[float],
+                                         big_alphas: Sequence[float], fee: float = FEE,
+                                         slippage: float = SLIPPAGE) -> SweepResult:
+    """
+    Backtest the exponential moving average crossover strategy for every (small_alpha, big_alpha) pair of a grid.
+
+    Every distinct alpha is smoothed once and all pairs are simulated together, the results match running
+    strategies.backtesting.exponential_moving_average_crossover once per pair on the same prices. An empty grid, or
+    one where no small alpha is smaller than a big alpha, raises a ValueError.
+
+    Parameters:
+    - prices (np.ndarray): Closing prices to backtest on, oldest first.
+    - investment (float): Amount of money to begin each simulation with.
+    - small_alphas (Sequence[float]): Candidate alphas for the less reactive moving average.
+    - big_alphas (Sequence[float]): Candidate alphas for the more reactive moving average, pairs where the small
+      alpha is not smaller than the big alpha are skipped.
+    - fee (float): Fraction of the traded value paid as fees on every buy and sell.
+    - slippage (float): Fraction by which fills are worse than the close.
+
+    Returns:
+    - SweepResult: Final value, trade count and drawdown per (small_alpha, big_alpha) pair.
+    """
+
+    prices = np.asarray(prices, dtype=np.float64)
+    averages, indices, pairs = alpha_grid(prices, small_alphas, big_alphas)
+    return evaluate(prices, investment, averages, indices, pairs, ("small_alpha", "big_alpha"), fee, slippage)
+
+
+def window_grid(prices: np.ndarray, short_windows: Sequence[int],
+                long_windows: Sequence[int]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Smooths the prices once for every distinct window of a (short_window, long_window) grid.
+
+    Returns:
+    - Tuple[np.ndarray, np.ndarray, np.ndarray]: The SMAs (one row per distinct window), the (short, long) rows of
+      every pair, and the (short_window, long_window) pairs themselves. Pairs where the short window is not shorter
+      than the long window are skipped, a ValueError is raised if either grid is empty or no pair is left.
+    """
+
+    _check_grid(short_windows=short_windows, long_windows=long_windows)
+    pairs = np.array([(short, long) for short in short_windows for long in long_windows if short < long],
+                     dtype=np.int64).reshape(-1, 2)
+    if len(pairs) == 0:
+        raise ValueError("no short window is shorter than a long window, there is nothing to sweep")
+
+    windows, indices = np.unique(pairs, return_inverse=True)
+    series = fingerprint(prices)
+    averages = np.stack([default_cache.simple_moving_average(prices, window, series=series)
+                         for window in windows.tolist()])
+    return averages, indices.reshape(pairs.shape), pairs
+
+
+def alpha_grid(prices: np.ndarray, small_alphas: Sequence[float],
+               big_alphas: Sequence[float]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Smooths the prices once for every distinct alpha of a (small_alpha, big_alpha) grid, see window_grid.
+    """
+
+    _check_grid(small_alphas=small_alphas, big_alphas=big_alphas)
+    pairs = np.array([(small, big) for small in small_alphas for big in big_alphas if small < big],
+                     dtype=np.float64).reshape(-1, 2)
+    if len(pairs) == 0:
+        raise ValueError("no small alpha is smaller than a big alpha, there is nothing to sweep")
+
+    alphas, indices = np.unique(pairs, return_inverse=True)
+    series = fingerprint(prices)
+    averages = np.stack([default_cache.exponential_moving_average(prices, alpha, series=series)
+                         for alpha in alphas.tolist()])
+
+    # the big alpha gives the more reactive (short) average, so it goes first
+    return averages, indices.reshape(pairs.shape)[:, ::-1], pairs
+
+
+def _check_grid(**grids: Sequence) -> None:
+    # an empty grid would otherwise surface as an obscure numpy error once no pair is left to smooth
+    for name, values in grids.items():
+        if len(values) == 0:
+            raise ValueError(f"{name} is empty, the sweep needs at least one value for every parameter")
+
+
+def evaluate(prices: np.ndarray, investment: float, averages: np.ndarray, indices: np.ndarray,
+             parameters: np.ndarray, parameter_names: Tuple[str, str], fee: float = FEE,
+             slippage: float = SLIPPAGE) -> SweepResult:
+    """
+    Simulates the crossover strategy for many pairs of precomputed moving averages at once.
+
+    Parameters:
+    - prices (np.ndarray): Closing prices to backtest on, oldest first.
+    - investment (float): Amount of money to begin each simulation with.
+    - averages (np.ndarray): Moving averages of the prices, one row per distinct parameter.
+    - indices (np.ndarray): The (short, long) rows of averages for every pair.
+    - parameters (np.ndarray): The parameters of every pair, reported in the result.
+    - parameter_names (Tuple[str, str]): Names of the two parameters.
+    - fee (float): Fraction of the traded value paid as fees on every buy and sell.
+    - slippage (float): Fraction by which fills are worse than the close.
+
+    Returns:
+    - SweepResult: Final value, trade count and drawdown per pair.
+    """
+
+    final_value = np.empty(len(indices))
+    trades = np.empty(len(indices), dtype=np.int64)
+    max_drawdown = np.empty(len(indices))
+
+    chunk = max(1, CHUNK_ELEMENTS // max(1, len(prices)))
+    for start in range(0, len(indices), chunk):
+        stop = start + chunk
+        positions = crossover_positions(averages[indices[start:stop, 0]], averages[indices[start:stop, 1]])
+        equity = equity_curve(prices, positions, investment, fee, slippage)
+        final_value[start:stop] = equity[:, -1]
+        trades[start:stop] = np.count_nonzero(positions[:, 1:] & ~positions[:, :-1], axis=1)
+        max_drawdown[start:stop] = np.max(1 - equity / np.maximum.accumulate(equity, axis=1), axis=1)
+
+    return SweepResult(parameter_names, parameters, final_value, trades, max_drawdown)
+
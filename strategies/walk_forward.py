@@ -0,0 +1,164 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+from strategies.backtesting import FEE, SLIPPAGE, crossover_positions, simulate
+from strategies.sweep import alpha_grid, evaluate, window_grid
+
+import numpy as np
+
+
+@dataclass
+class Fold:
+    """One train/test split of a walk-forward optimization, bar ranges are [start, stop)."""
+    train: Tuple[int, int]
+    test: Tuple[int, int]
+    parameters: Tuple[float, float]  # the best parameters on the train range
+    train_value: float  # final value on the train range with those parameters
+    test_value: float  # final value on the test range with those parameters
+    test_max_drawdown: float
+
+
+@dataclass
+class WalkForwardReport:
+    """Out-of-sample results of a walk-forward optimization."""
+    parameter_names: Tuple[str, str]
+    investment: float
+    folds: List[Fold]
+    equity: np.ndarray  # test ranges chained together, each fold reinvests the previous fold's final value
+
+    @property
+    def out_of_sample_return(self) -> float:
+        """Compounded return over all test ranges."""
+        return float(self.equity[-1] / self.investment - 1) if len(self.equity) else 0.0
+
+    @property
+    def max_drawdown(self) -> float:
+        """Largest fractional drop of the chained out-of-sample equity curve from its running peak."""
+        return float(np.max(1 - self.equity / np.maximum.accumulate(self.equity))) if len(self.equity) else 0.0
+
+    def rows(self) -> List[Dict[str, float]]:
+        """Returns the folds as a list of table rows."""
+        return [{"train_start": fold.train[0], "train_stop": fold.train[1], "test_start": fold.test[0],
+                 "test_stop": fold.test[1], self.parameter_names[0]: fold.parameters[0],
+                 self.parameter_names[1]: fold.parameters[1], "train_return": fold.train_value / self.investment - 1,
+                 "test_return": fold.test_value / self.investment - 1, "test_max_drawdown": fold.test_max_drawdown}
+                for fold in self.folds]
+
+
+def folds(length: int, train_size: int, test_size: int, step: Optional[int] = None,
+          anchored: bool = False) -> List[Tuple[Tuple[int, int], Tuple[int, int]]]:
+    """
+    Splits a series into rolling train/test ranges.
+
+    Parameters:
+    - length (int): Number of bars in the series.
+    - train_size (int): Number of bars to optimize on.
+    - test_size (int): Number of bars following the train range to evaluate on.
+    - step (int): Bars between the starts of consecutive folds, defaults to test_size. It cannot be smaller, the
+      test ranges are chained into one equity curve and overlapping ranges would count bars twice.
+    - anchored (bool): If True every train range starts at the first bar and grows, instead of rolling.
+
+    Returns:
+    - List[Tuple[Tuple[int, int], Tuple[int, int]]]: ([train start, train stop), [test start, test stop)) per fold.
+    """
+
+    step = step or test_size
+    if step < test_size:
+        raise ValueError("step cannot be smaller than test_size, the test ranges would overlap")
+
+    splits = []
+    start = 0
+    while start + train_size + test_size <= length:
+        train_stop = start + train_size
+        splits.append(((0 if anchored else start, train_stop), (train_stop, train_stop + test_size)))
+        start += step
+    return splits
+
+
+def moving_average_crossover(prices: np.ndarray, investment: float, short_windows: Sequence[int],
+                             long_windows: Sequence[int], train_size: int, test_size: int,
+                             step: Optional[int] = None, anchored: bool = False, workers: Optional[int] = None,
+                             fee: float = FEE, slippage: float = SLIPPAGE) -> WalkForwardReport:
+    """
+    Walk-forward optimization of the moving average crossover strategy.
+
+    For every fold the (short_window, long_window) pair with the highest final value on the train range is picked
+    and then evaluated on the following test range. Every SMA is computed once over the full history, folds only
+    take views of it, so indicators are already warmed up at the start of every range.
+
+    Parameters:
+    - prices (np.ndarray): Closing prices, oldest first.
+    - investment (float): Amount of money to begin every simulation with.
+    - short_windows (Sequence[int]): Candidate windows for the shorter moving average.
+    - long_windows (Sequence[int]): Candidate windows for the longer moving average.
+    - train_size (int): Number of bars to optimize on.
+    - test_size (int): Number of bars to evaluate the chosen parameters on.
+    - step (int): Bars between the starts of consecutive folds, at least and by default test_size.
+    - anchored (bool): If True every train range starts at the first bar.
+    - workers (int): Number of folds evaluated in parallel, defaults to one per CPU.
+    - fee (float): Fraction of the traded value paid as fees on every buy and sell.
+    - slippage (float): Fraction by which fills are worse than the close.
+
+    Returns:
+    - WalkForwardReport: Chosen parameters and results of every fold, and the chained out-of-sample equity.
+    """
+
+    prices = np.asarray(prices, dtype=np.float64)
+    averages, indices, pairs = window_grid(prices, short_windows, long_windows)
+    return _walk_forward(prices, investment, averages, indices, pairs, ("short_window", "long_window"),
+                         folds(len(prices), train_size, test_size, step, anchored), workers, fee, slippage)
+
+
+def exponential_moving_average_crossover(prices: np.ndarray, investment: float, small_alphas: Sequence[float],
+                                         big_alphas: Sequence[float], train_size: int, test_size: int,
+                                         step: Optional[int] = None, anchored: bool = False,
+                                         workers: Optional[int] = None, fee: float = FEE,
+                                         slippage: float = SLIPPAGE) -> WalkForwardReport:
+    """
+    Walk-forward optimization of the exponential moving average crossover strategy, see moving_average_crossover.
+    Every EMA is computed once over the full history.
+    """
+
+    prices = np.asarray(prices, dtype=np.float64)
+    averages, indices, pairs = alpha_grid(prices, small_alphas, big_alphas)
+    return _walk_forward(prices, investment, averages, indices, pairs, ("small_alpha", "big_alpha"),
+                         folds(len(prices), train_size, test_size, step, anchored), workers, fee, slippage)
+
+
+def _walk_forward(prices: np.ndarray, investment: float, averages: np.ndarray, indices: np.ndarray,
+                  pairs: np.ndarray, parameter_names: Tuple[str, str],
+                  splits: List[Tuple[Tuple[int, int], Tuple[int, int]]], workers: Optional[int], fee: float,
+                  slippage: float) -> WalkForwardReport:
+
+    def run_fold(split: Tuple[Tuple[int, int], Tuple[int, int]]) -> Tuple[Fold, np.ndarray]:
+        (train_start, train_stop), (test_start, test_stop) = split
+
+        # optimize on the train range
+        train = evaluate(prices[train_start:train_stop], investment, averages[:, train_start:train_stop],
+                         indices, pairs, parameter_names, fee, slippage)
+        best = int(np.argmax(train.final_value))
+
+        # evaluate the chosen pair out of sample
+        short, long = indices[best]
+        positions = crossover_positions(averages[short, test_start:test_stop], averages[long, test_start:test_stop])
+        test = simulate(prices[test_start:test_stop], positions, investment, fee, slippage)
+
+        drawdown = float(np.max(1 - test.equity / np.maximum.accumulate(test.equity)))
+        fold = Fold((train_start, train_stop), (test_start, test_stop), tuple(pairs[best].tolist()),
+                    float(train.final_value[best]), test.final_value, drawdown)
+        return fold, test.equity
+
+    # the folds only read shared arrays and spend their time in NumPy, which releases the GIL, so threads suffice
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1) as executor:
+        results = list(executor.map(run_fold, splits))
+
+    # chain the test ranges: every fold starts with what the previous one ended with
+    equity = []
+    scale = 1.0
+    for _, test_equity in results:
+        equity.append(test_equity * scale)
+        scale *= test_equity[-1] / investment
+
+    return WalkForwardReport(parameter_names, investment, [fold for fold, _ in results],
+                             np.concatenate(equity) if equity else np.empty(0))
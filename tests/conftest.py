@@ -0,0 +1,33 @@
+from typing import List, Optional
+from benchmarks.synthetic import SyntheticExchange
+
+import pytest
+
+
+class RowsExchange:
+    """
+    A SyntheticExchange seen the way a ccxt exchange is: only fetch_ohlcv, so the paginated download paths are taken
+    instead of the columnar fast paths.
+    """
+
+    id = "synthetic"
+
+    def __init__(self, exchange: SyntheticExchange):
+        self.exchange = exchange
+
+    @property
+    def requests(self) -> int:
+        return self.exchange.requests
+
+    def milliseconds(self) -> int:
+        return self.exchange.milliseconds()
+
+    def fetch_ohlcv(self, symbol: str, timeframe: str = "1m", since: Optional[int] = None,
+                    limit: Optional[int] = None, params: Optional[dict] = None) -> List[List[float]]:
+        return self.exchange.fetch_ohlcv(symbol, timeframe, since=since, limit=limit)
+
+
+@pytest.fixture
+def rows_exchange():
+    """Builds a RowsExchange over a SyntheticExchange, EX: rows_exchange(2000, max_limit=300)."""
+    return lambda bars, max_limit=None: RowsExchange(SyntheticExchange(bars, max_limit=max_limit))
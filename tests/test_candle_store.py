@@ -0,0 +1,63 @@
+import zlib
+from benchmarks.synthetic import synthetic_ohlcv
+from data.candle_store import CachedExchange, CandleStore
+
+import numpy as np
+
+SYMBOL = "BTC/USD"
+
+
+def expected_closes(bars: int, limit: int) -> np.ndarray:
+    return synthetic_ohlcv(bars, zlib.crc32(SYMBOL.encode()))[-limit:, 4]
+
+
+def test_first_run_downloads_the_series(rows_exchange, tmp_path):
+    exchange = rows_exchange(2000)
+    closes = CachedExchange(exchange, CandleStore(str(tmp_path))).fetch_closes(SYMBOL, "1m", 500)
+
+    np.testing.assert_array_equal(closes, expected_closes(2000, 500))
+
+
+def test_repeat_run_costs_a_single_request(rows_exchange, tmp_path):
+    exchange = rows_exchange(2000)
+    CachedExchange(exchange, CandleStore(str(tmp_path))).fetch_closes(SYMBOL, "1m", 500)
+
+    # a new process over the same store: the series is up to date, only the newest candles are asked for
+    requests = exchange.requests
+    closes = CachedExchange(exchange, CandleStore(str(tmp_path))).fetch_closes(SYMBOL, "1m", 500)
+
+    assert exchange.requests - requests == 1
+    np.testing.assert_array_equal(closes, expected_closes(2000, 500))
+
+
+def test_fresh_series_is_served_without_requests(rows_exchange, tmp_path):
+    exchange = rows_exchange(2000)
+    cached = CachedExchange(exchange, CandleStore(str(tmp_path)))
+    cached.fetch_closes(SYMBOL, "1m", 500)
+
+    requests = exchange.requests
+    cached.fetch_closes(SYMBOL, "1m", 300)
+
+    assert exchange.requests == requests
+
+
+def test_deeper_request_backfills_older_candles(rows_exchange, tmp_path):
+    exchange = rows_exchange(2000, max_limit=300)
+    store = CandleStore(str(tmp_path), page_limit=300)
+    CachedExchange(exchange, store).fetch_closes(SYMBOL, "1m", 200)
+
+    closes = CachedExchange(exchange, store).fetch_closes(SYMBOL, "1m", 1500)
+
+    np.testing.assert_array_equal(closes, expected_closes(2000, 1500))
+    timestamps = store.load("synthetic", SYMBOL, "1m")["timestamp"]
+    assert len(timestamps) == 1500 and np.all(np.diff(timestamps) == 60_000)
+
+
+def test_backfill_stops_at_the_oldest_candle(rows_exchange, tmp_path):
+    exchange = rows_exchange(400, max_limit=300)
+    store = CandleStore(str(tmp_path), page_limit=300)
+    CachedExchange(exchange, store).fetch_closes(SYMBOL, "1m", 100)
+
+    closes = CachedExchange(exchange, store).fetch_closes(SYMBOL, "1m", 1000)
+
+    np.testing.assert_array_equal(closes, expected_closes(400, 400))
@@ -0,0 +1,106 @@
+import asyncio
+import time
+from typing import List, Optional
+from benchmarks.synthetic import SyntheticExchange
+from strategies.moving_averages import Action, Position, generate_signals, moving_average_crossover
+
+import pytest
+
+WATCHLIST = [f"COIN{index}/USD" for index in range(8)]
+
+
+class AsyncExchange:
+    """An asynchronous ccxt-like exchange over SyntheticExchange, every fetch takes "latency" seconds."""
+
+    id = "synthetic"
+
+    def __init__(self, latency: float = 0.0, failing: frozenset = frozenset()):
+        self.exchange = SyntheticExchange(100)
+        self.latency = latency
+        self.failing = failing
+        self.in_flight = 0
+        self.most_in_flight = 0
+        self.cancelled = 0
+
+    async def fetch_ohlcv(self, symbol: str, timeframe: str = "1m", since: Optional[int] = None,
+                          limit: Optional[int] = None, params: Optional[dict] = None) -> List[List[float]]:
+        self.in_flight += 1
+        self.most_in_flight = max(self.most_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        finally:
+            self.in_flight -= 1
+        if symbol in self.failing:
+            raise ConnectionError(f"{symbol} is unavailable")
+        return self.exchange.fetch_ohlcv(symbol, timeframe, since=since, limit=limit)
+
+
+def expected(exchange, symbol: str) -> Action:
+    return moving_average_crossover(exchange, symbol, 5, 20, position=Position.OUT)
+
+
+def test_fetches_run_concurrently():
+    exchange = AsyncExchange(latency=0.2)
+
+    start = time.perf_counter()
+    signals = asyncio.run(generate_signals(exchange, WATCHLIST, moving_average_crossover, 5, 20))
+
+    assert time.perf_counter() - start < 0.2 * len(WATCHLIST) / 2
+    assert exchange.most_in_flight > 1
+    assert signals == {symbol: expected(exchange.exchange, symbol) for symbol in WATCHLIST}
+    assert list(signals) == WATCHLIST
+
+
+def test_concurrency_caps_requests_in_flight():
+    exchange = AsyncExchange(latency=0.05)
+
+    asyncio.run(generate_signals(exchange, WATCHLIST, moving_average_crossover, 5, 20, concurrency=3))
+
+    assert 1 < exchange.most_in_flight <= 3
+
+
+def test_failures_are_collected():
+    exchange = AsyncExchange(failing=frozenset(WATCHLIST[2:4]))
+    errors = {}
+
+    signals = asyncio.run(generate_signals(exchange, WATCHLIST, moving_average_crossover, 5, 20, errors=errors))
+
+    assert list(signals) == WATCHLIST[:2] + WATCHLIST[4:]
+    assert list(errors) == WATCHLIST[2:4]
+    assert all(isinstance(error, ConnectionError) for error in errors.values())
+
+
+def test_failures_raise_without_an_errors_dict():
+    exchange = AsyncExchange(failing=frozenset(WATCHLIST[:1]))
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(generate_signals(exchange, WATCHLIST, moving_average_crossover, 5, 20))
+
+
+def test_cancellation_cancels_the_fetches_in_flight():
+    exchange = AsyncExchange(latency=60)
+
+    async def run():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(generate_signals(exchange, WATCHLIST, moving_average_crossover, 5, 20), 0.2)
+        # checked while the loop still runs, asyncio.run would cancel whatever is left once it returns
+        await asyncio.sleep(0.1)
+        assert exchange.cancelled == len(WATCHLIST)
+        assert exchange.in_flight == 0
+
+    start = time.perf_counter()
+    asyncio.run(run())
+
+    assert time.perf_counter() - start < 5
+
+
+def test_columnar_exchanges_skip_fetch_ohlcv():
+    exchange = SyntheticExchange(100)
+
+    signals = asyncio.run(generate_signals(exchange, WATCHLIST, moving_average_crossover, 5, 20))
+
+    assert exchange.requests == 0
+    assert signals == {symbol: expected(exchange, symbol) for symbol in WATCHLIST}
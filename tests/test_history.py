@@ -0,0 +1,58 @@
+import asyncio
+import zlib
+from benchmarks.synthetic import synthetic_ohlcv
+from data.candle_store import fetch_candles, fetch_closes
+from data.history import load_history
+
+import numpy as np
+import pytest
+
+SYMBOL = "BTC/USD"
+
+
+def expected_candles(bars: int) -> np.ndarray:
+    return synthetic_ohlcv(bars, zlib.crc32(SYMBOL.encode()))
+
+
+@pytest.mark.parametrize("limit", [1, 300, 365, 999, 1000, 1001, 2500])
+def test_fetch_candles_pages_past_a_300_candle_cap(rows_exchange, limit):
+    exchange = rows_exchange(3000, max_limit=300)
+
+    candles = fetch_candles(exchange, SYMBOL, "1m", limit)
+
+    expected = expected_candles(3000)[-limit:]
+    np.testing.assert_array_equal(candles.timestamp, expected[:, 0])
+    np.testing.assert_array_equal(candles.close, expected[:, 4])
+
+
+def test_a_short_page_is_continued_in_pages_of_the_cap(rows_exchange):
+    exchange = rows_exchange(3000, max_limit=300)
+
+    fetch_candles(exchange, SYMBOL, "1m", 365)
+
+    assert exchange.requests == 2
+
+
+def test_a_full_page_costs_a_single_request(rows_exchange):
+    exchange = rows_exchange(3000, max_limit=300)
+
+    fetch_candles(exchange, SYMBOL, "1m", 300)
+
+    assert exchange.requests == 1
+
+
+def test_fetch_candles_stops_at_the_oldest_candle(rows_exchange):
+    exchange = rows_exchange(400, max_limit=300)
+
+    closes = fetch_closes(exchange, SYMBOL, "1m", 1000)
+
+    np.testing.assert_array_equal(closes, expected_candles(400)[:, 4])
+
+
+def test_load_history_continues_partial_pages(rows_exchange):
+    exchange = rows_exchange(3000, max_limit=300)
+
+    history = asyncio.run(load_history(exchange, SYMBOL, "1m", since=60_000 * 100, until=60_000 * 2100))
+
+    np.testing.assert_array_equal(history.candles.timestamp, expected_candles(3000)[100:2100, 0])
+    assert history.gaps == []